@@ -0,0 +1,446 @@
+import operator
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from bisect import bisect_left
+from itertools import islice
+
+# Roaring-style layout: ids are split into a high part (id >> 16) and a
+# 16 bit low part. Each high part gets one container for its lows:
+#   array container   sorted array('H'), 2 bytes an id, up to 4096 ids
+#   bitmap container  bytearray of 65536 bits (8 KB), for more than that
+# so sparse ranges cost 2 bytes an id and dense ones 1 bit.
+
+ARRAY_MAX = 4096
+BITMAP_BYTES = 8192
+UPDATE_CHUNK = 1 << 17  # ids update() sorts at a time
+MAGIC = b"RBSET001"
+HEADER = struct.Struct("<8sQ")  # magic, containers
+CONTAINER = struct.Struct("<QBI")  # high part, kind (0 array, 1 bitmap), ids
+BYTE_BITS = [[bit for bit in range(8) if byte >> bit & 1] for byte in range(256)]
+
+
+def _bitmap_of(lows):
+    bits = bytearray(BITMAP_BYTES)
+    for low in lows:
+        bits[low >> 3] |= 1 << (low & 7)
+    return bits
+
+
+def _lows_of(bits):
+    # the set lows of a bitmap, in order
+    return array("H", [i << 3 | bit for i, byte in enumerate(bits) if byte
+                       for bit in BYTE_BITS[byte]])
+
+
+def _as_int(container):
+    if isinstance(container, bytearray):
+        return int.from_bytes(container, "little")
+    return int.from_bytes(_bitmap_of(container), "little")
+
+
+def _from_int(bits):
+    # the smaller container for these bits, None when empty
+    count = bits.bit_count()
+    if not count:
+        return None
+    raw = bytearray(bits.to_bytes(BITMAP_BYTES, "little"))
+    return raw if count > ARRAY_MAX else _lows_of(raw)
+
+
+def _from_lows(lows):
+    # lows sorted and unique
+    if not lows:
+        return None
+    if len(lows) > ARRAY_MAX:
+        return _bitmap_of(lows)
+    return lows if isinstance(lows, array) else array("H", lows)
+
+
+def _merge(op, a, b):
+    # two sorted array containers walked side by side
+    keep_a = op != "and"  # lows only in a
+    keep_b = op in ("or", "xor")  # lows only in b
+    keep_both = op in ("and", "or")
+    out = array("H")
+    append = out.append
+    rest_a, rest_b = iter(a), iter(b)
+    x, y = next(rest_a, None), next(rest_b, None)
+    while x is not None and y is not None:
+        if x < y:
+            if keep_a:
+                append(x)
+            x = next(rest_a, None)
+        elif y < x:
+            if keep_b:
+                append(y)
+            y = next(rest_b, None)
+        else:
+            if keep_both:
+                append(x)
+            x, y = next(rest_a, None), next(rest_b, None)
+    if keep_a and x is not None:
+        append(x)
+        out.extend(rest_a)
+    if keep_b and y is not None:
+        append(y)
+        out.extend(rest_b)
+    return _from_lows(out)
+
+
+def _count(container):
+    if isinstance(container, bytearray):
+        return int.from_bytes(container, "little").bit_count()
+    return len(container)
+
+
+def _combine(op, a, b):
+    # one container op; two arrays are merged, the rest done as big ints
+    if not isinstance(a, bytearray) and not isinstance(b, bytearray):
+        return _merge(op, a, b)
+    if op == "and" and not isinstance(a, bytearray):
+        return _from_lows([low for low in a if b[low >> 3] >> (low & 7) & 1])
+    x, y = _as_int(a), _as_int(b)
+    if op == "and":
+        return _from_int(x & y)
+    if op == "or":
+        return _from_int(x | y)
+    if op == "sub":
+        return _from_int(x & ~y)
+    return _from_int(x ^ y)
+
+
+class BitmapSet:
+    """A set of non-negative ints, compressed roaring-style.
+
+    Works like a set: add, discard, remove, in, len, iteration (in
+    order) and the operators |, &, -, ^ (plus |=, &=, -=, ^=). Costs
+    2 bytes an id in sparse ranges and 1 bit an id in dense ones,
+    against 30-60 bytes in a set. save() / load() and to_bytes() /
+    from_bytes() store it in the same compact form.
+    """
+
+    def __init__(self, values=()):
+        self.containers = {}  # high part -> array('H') or bytearray
+        self.thinned = set()  # highs of bitmaps discard() took ids from
+        self.update(values)
+
+    # one id at a time
+
+    def add(self, value):
+        if value < 0:
+            raise ValueError("BitmapSet holds non-negative ints only")
+        high, low = value >> 16, value & 0xFFFF
+        container = self.containers.get(high)
+        if container is None:
+            self.containers[high] = array("H", [low])
+        elif isinstance(container, bytearray):
+            container[low >> 3] |= 1 << (low & 7)
+        else:
+            i = bisect_left(container, low)
+            if i == len(container) or container[i] != low:
+                if len(container) == ARRAY_MAX:
+                    bits = _bitmap_of(container)
+                    bits[low >> 3] |= 1 << (low & 7)
+                    self.containers[high] = bits
+                else:
+                    container.insert(i, low)
+
+    def discard(self, value):
+        high, low = value >> 16, value & 0xFFFF
+        container = self.containers.get(high)
+        if container is None or value < 0:
+            return
+        if isinstance(container, bytearray):
+            container[low >> 3] &= ~(1 << (low & 7)) & 0xFF
+            self.thinned.add(high)  # resized later, counting 8 KB per discard is slow
+            return
+        i = bisect_left(container, low)
+        if i < len(container) and container[i] == low:
+            del container[i]
+            if not container:
+                del self.containers[high]
+
+    def _compact(self):
+        # thinned bitmaps go back to arrays, or away when empty
+        for high in self.thinned:
+            container = self.containers.get(high)
+            if isinstance(container, bytearray):
+                container = _from_int(_as_int(container))
+                if container is None:
+                    del self.containers[high]
+                else:
+                    self.containers[high] = container
+        self.thinned.clear()
+
+    def remove(self, value):
+        if value not in self:
+            raise KeyError(value)
+        self.discard(value)
+
+    def __contains__(self, value):
+        if not isinstance(value, int) or value < 0:
+            return False
+        container = self.containers.get(value >> 16)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if isinstance(container, bytearray):
+            return bool(container[low >> 3] >> (low & 7) & 1)
+        i = bisect_left(container, low)
+        return i < len(container) and container[i] == low
+
+    # many at once
+
+    def update(self, values):
+        # a bounded chunk at a time, so a huge input never becomes one big
+        # set or list: sort the chunk, hand each container its slice of lows
+        values = iter(values)
+        while True:
+            chunk = sorted(set(islice(values, UPDATE_CHUNK)))
+            if not chunk:
+                return
+            if chunk[0] < 0:
+                raise ValueError("BitmapSet holds non-negative ints only")
+            self._add_sorted(chunk)
+
+    def _add_sorted(self, values):
+        # values sorted, unique and non-negative
+        start = 0
+        while start < len(values):
+            high = values[start] >> 16
+            base = high << 16
+            end = bisect_left(values, base + 0x10000, start)
+            lows = list(map(base.__rsub__, values[start:end]))
+            container = self.containers.get(high)
+            if container is None:
+                self.containers[high] = _from_lows(lows)
+            elif not isinstance(container, bytearray) and len(container) + len(lows) <= ARRAY_MAX:
+                # stays an array: inserting in place beats a merge
+                for low in lows:
+                    i = bisect_left(container, low)
+                    if i == len(container) or container[i] != low:
+                        container.insert(i, low)
+            else:
+                self.containers[high] = _combine("or", container, _from_lows(lows))
+            start = end
+
+    def __len__(self):
+        return sum(map(_count, self.containers.values()))
+
+    def __iter__(self):
+        for high in sorted(self.containers):
+            container = self.containers[high]
+            lows = _lows_of(container) if isinstance(container, bytearray) else container
+            yield from map((high << 16).__add__, lows)
+
+    def __eq__(self, other):
+        if not isinstance(other, BitmapSet):
+            return NotImplemented
+        mine = {h: _as_int(c) for h, c in self.containers.items()}
+        mine = {h: bits for h, bits in mine.items() if bits}
+        theirs = {h: _as_int(c) for h, c in other.containers.items()}
+        return mine == {h: bits for h, bits in theirs.items() if bits}
+
+    def __repr__(self):
+        self._compact()
+        return f"BitmapSet({len(self)} ids in {len(self.containers)} containers)"
+
+    # set operators
+
+    def _apply(self, other, op):
+        self._compact()
+        other._compact()
+        result = BitmapSet()
+        mine, theirs = self.containers, other.containers
+        if op == "and":
+            highs = mine.keys() & theirs.keys()
+        elif op == "sub":
+            highs = mine.keys()
+        else:
+            highs = mine.keys() | theirs.keys()
+        for high in highs:
+            a, b = mine.get(high), theirs.get(high)
+            if a is None or b is None:
+                container = a if b is None else b
+                container = container[:]  # a copy, results share nothing
+            else:
+                container = _combine(op, a, b)
+            if container is not None:
+                result.containers[high] = container
+        return result
+
+    def __or__(self, other):
+        return self._apply(other, "or")
+
+    def __and__(self, other):
+        return self._apply(other, "and")
+
+    def __sub__(self, other):
+        return self._apply(other, "sub")
+
+    def __xor__(self, other):
+        return self._apply(other, "xor")
+
+    def __ior__(self, other):
+        self.containers = (self | other).containers
+        return self
+
+    def __iand__(self, other):
+        self.containers = (self & other).containers
+        return self
+
+    def __isub__(self, other):
+        self.containers = (self - other).containers
+        return self
+
+    def __ixor__(self, other):
+        self.containers = (self ^ other).containers
+        return self
+
+    # storage
+
+    def nbytes(self):
+        self._compact()
+        return sum(BITMAP_BYTES if isinstance(c, bytearray) else 2 * len(c)
+                   for c in self.containers.values())
+
+    def to_bytes(self):
+        self._compact()
+        parts = [HEADER.pack(MAGIC, len(self.containers))]
+        for high in sorted(self.containers):
+            container = self.containers[high]
+            if isinstance(container, bytearray):
+                parts.append(CONTAINER.pack(high, 1, _count(container)))
+                parts.append(bytes(container))
+            else:
+                parts.append(CONTAINER.pack(high, 0, len(container)))
+                if sys.byteorder == "big":
+                    container = array("H", container)
+                    container.byteswap()
+                parts.append(container.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = memoryview(data)
+        if len(data) < HEADER.size:
+            raise ValueError("not a serialized BitmapSet")
+        magic, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("not a serialized BitmapSet")
+        result = cls()
+        pos = HEADER.size
+        for _ in range(count):
+            if pos + CONTAINER.size > len(data):
+                raise ValueError("BitmapSet bytes end in the middle of a container")
+            high, kind, ids = CONTAINER.unpack_from(data, pos)
+            pos += CONTAINER.size
+            size = BITMAP_BYTES if kind == 1 else 2 * ids
+            if kind not in (0, 1) or (kind == 0 and ids > ARRAY_MAX) or pos + size > len(data):
+                raise ValueError("BitmapSet bytes do not match their containers")
+            if kind == 1:
+                container = bytearray(data[pos:pos + size])
+                if _count(container) != ids:
+                    raise ValueError("BitmapSet bytes do not match their containers")
+            else:
+                container = array("H")
+                container.frombytes(data[pos:pos + size])
+                if sys.byteorder == "big":
+                    container.byteswap()
+                if any(map(operator.ge, container, container[1:])):
+                    raise ValueError("BitmapSet bytes do not match their containers")
+            result.containers[high] = container
+            pos += size
+        if pos != len(data):
+            raise ValueError("BitmapSet bytes do not match their containers")
+        return result
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    rng = random.Random(23)
+
+    # the examples from set.py
+    set1, set2 = BitmapSet([1, 2, 3, 4]), BitmapSet([3, 4, 5, 6])
+    assert list(set1 | set2) == [1, 2, 3, 4, 5, 6] and list(set1 & set2) == [3, 4]
+    assert list(set1 - set2) == [1, 2] and list(set1 ^ set2) == [1, 2, 5, 6]
+    dense = BitmapSet(range(70_000, 80_000))
+    for x in range(70_000, 79_000):
+        dense.discard(x)
+    assert dense.nbytes() == 2000 and isinstance(dense.containers[1], array)
+    for x in range(79_000, 80_000):
+        dense.discard(x)
+    assert not dense.containers and BitmapSet.from_bytes(dense.to_bytes()) == BitmapSet()
+    small, big = rng.sample(range(65536), 3000), rng.sample(range(65536), 4000)
+    for symbol, op in (("|", "__or__"), ("&", "__and__"), ("-", "__sub__"), ("^", "__xor__")):
+        got = getattr(BitmapSet(small), op)(BitmapSet(big))
+        assert list(got) == sorted(getattr(set(small), op)(set(big))), symbol
+
+    # a dense segment (ids spread over 4n) and a sparse one (over 200n)
+    segments = []
+    for spread in (4, 200):
+        a = rng.sample(range(spread * n), n)
+        b = rng.sample(range(spread * n), n)
+        segments.append((spread, a, b))
+
+    for spread, a, b in segments:
+        tracemalloc.start()
+        sa, sb = set(a), set(b)
+        set_bytes = tracemalloc.get_traced_memory()[0] / 2
+        tracemalloc.stop()
+        tracemalloc.start()
+        start = time.perf_counter()
+        ba, bb = BitmapSet(a), BitmapSet(b)
+        build = time.perf_counter() - start
+        bitmap_bytes = tracemalloc.get_traced_memory()[0] / 2
+        tracemalloc.stop()
+
+        print(f"{n:,} ids in a range of {spread * n:,}: set {set_bytes / n:5.1f} B/id, "
+              f"BitmapSet {bitmap_bytes / n:5.2f} B/id (built in {build:.2f}s)")
+        probe = rng.sample(range(spread * n), 100_000)
+        start = time.perf_counter()
+        hits = sum(1 for x in probe if x in sa)
+        set_in = time.perf_counter() - start
+        start = time.perf_counter()
+        assert sum(1 for x in probe if x in ba) == hits
+        bitmap_in = time.perf_counter() - start
+        print(f"  {'in':3s} set {set_in / len(probe) * 1e9:8.0f} ns   "
+              f"BitmapSet {bitmap_in / len(probe) * 1e9:8.0f} ns")
+        for symbol, op in (("|", "__or__"), ("&", "__and__"), ("-", "__sub__"), ("^", "__xor__")):
+            start = time.perf_counter()
+            expected = getattr(sa, op)(sb)
+            set_time = time.perf_counter() - start
+            start = time.perf_counter()
+            got = getattr(ba, op)(bb)
+            bitmap_time = time.perf_counter() - start
+            assert len(got) == len(expected)
+            print(f"  {symbol:3s} set {set_time * 1e3:8.1f} ms   BitmapSet {bitmap_time * 1e3:8.1f} ms")
+        assert sorted(expected) == list(got)
+
+        path = os.path.join(tempfile.mkdtemp(prefix="bitmap_set_"), "segment.rbs")
+        ba.save(path)
+        assert BitmapSet.load(path) == ba
+        for cut in (1, 100, BITMAP_BYTES):
+            try:
+                BitmapSet.from_bytes(ba.to_bytes()[:-cut])
+                raise AssertionError("a cut short BitmapSet was loaded")
+            except ValueError:
+                pass
+        print(f"  on disk {os.path.getsize(path) / n:.2f} B/id")
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
@@ -0,0 +1,329 @@
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+from mmap_dict import MmapDict
+
+MISSING = object()
+POLICIES = ("lru", "lfu", "ttl")
+
+
+class Cache:
+    """A size-limited dict in front of slow storage.
+
+    get / [] / []= / del / pop / in / len work like on a dict. When the
+    cache holds more than `max_entries` entries or `max_bytes` bytes (as
+    measured by `sizeof(value)`), entries are evicted by `policy`:
+
+        lru  the least recently used entry goes first
+        lfu  the least often used entry goes first (oldest among equals)
+        ttl  the entry closest to expiring goes first
+
+    With `ttl` seconds set (any policy) entries older than that count as
+    missing. `loader(key)` is called on a miss and its value is cached
+    (read-through); it raises KeyError for keys that do not exist.
+    `writer(key, value)` is called on every write, or with
+    `write_back=True` only when a changed entry is evicted or flush()ed.
+    hits, misses, evictions and expirations are counted.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, policy="lru", ttl=None,
+                 loader=None, writer=None, deleter=None, write_back=False,
+                 sizeof=sys.getsizeof, clock=time.monotonic):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}, not {policy!r}")
+        if policy == "ttl" and ttl is None:
+            raise ValueError("the ttl policy needs a ttl")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.ttl = ttl
+        self.loader = loader
+        self.writer = writer
+        self.deleter = deleter
+        self.write_back = write_back
+        self.sizeof = sizeof
+        self.clock = clock
+
+        self.data = {} if policy == "lfu" else OrderedDict()
+        self.expires = {} if ttl is not None else None  # key -> deadline
+        self.sizes = {} if max_bytes is not None else None  # key -> bytes
+        self.nbytes = 0
+        self.dirty = set()  # keys written but not yet given to writer
+        if policy == "lfu":
+            self.freq = {}  # key -> uses
+            self.buckets = {}  # uses -> {key: None}, oldest first
+            self.min_freq = 0
+            self._touch = self._bump
+        elif policy == "lru":
+            self._touch = self.data.move_to_end
+        else:
+            self._touch = lambda key: None  # expiry order only changes on writes
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    # dict interface
+
+    def get(self, key, default=None):
+        try:
+            value = self.data[key]
+        except KeyError:
+            return self._miss(key, default)
+        if self.expires is not None and self.expires[key] <= self.clock():
+            self._drop(key, save=True)  # a pending write-back still goes out
+            self.expirations += 1
+            return self._miss(key, default)
+        self.hits += 1
+        self._touch(key)
+        return value
+
+    def __getitem__(self, key):
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if self.writer is not None and not self.write_back:
+            self.writer(key, value)
+            self._store(key, value, dirty=False)
+        else:
+            self._store(key, value, dirty=True)
+
+    def pop(self, key, default=MISSING):
+        # removes the key from the cache and, with a deleter, from storage
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            if default is MISSING:
+                raise KeyError(key)
+            return default
+        self.dirty.discard(key)
+        self._drop(key)
+        if self.deleter is not None:
+            try:
+                self.deleter(key)
+            except KeyError:
+                pass  # written to the cache only, storage never had it
+        return value
+
+    def __delitem__(self, key):
+        self.pop(key)
+
+    def __contains__(self, key):
+        # only asks the cache: no loading, no counting
+        if key not in self.data:
+            return False
+        return self.expires is None or self.expires[key] > self.clock()
+
+    def __len__(self):
+        # live entries only, like keys() and in
+        self.expire()
+        return len(self.data)
+
+    def keys(self):
+        return [key for key in list(self.data) if key in self]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def items(self):
+        return [(key, self.data[key]) for key in self.keys()]
+
+    def flush(self):
+        # hand every changed entry to the writer
+        if self.writer is not None:
+            for key in list(self.dirty):
+                self.writer(key, self.data[key])
+        self.dirty.clear()
+
+    def clear(self):
+        self.flush()
+        for key in list(self.data):
+            self._drop(key)
+
+    def expire(self):
+        # drop everything past its deadline now instead of when it is asked for
+        if self.expires is None:
+            return
+        now = self.clock()
+        for key in [k for k, deadline in self.expires.items() if deadline <= now]:
+            self._drop(key, save=True)
+            self.expirations += 1
+
+    def stats(self):
+        asked = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / asked if asked else 0.0,
+                "entries": len(self.data), "bytes": self.nbytes}
+
+    # bookkeeping
+
+    def _miss(self, key, default):
+        self.misses += 1
+        if self.loader is None:
+            return default
+        try:
+            value = self.loader(key)
+        except KeyError:
+            return default
+        self._store(key, value, dirty=False)
+        return value
+
+    def _store(self, key, value, dirty):
+        data = self.data
+        size = self.sizeof(value) if self.sizes is not None else 0
+        if key in data:
+            self._touch(key)
+        else:
+            # make room first, so a new lfu entry is not its own victim
+            self._evict(1, size)
+        if key not in data and self.policy == "lfu":
+            self.freq[key] = 1
+            self.buckets.setdefault(1, {})[key] = None
+            self.min_freq = 1
+        data[key] = value
+        if self.expires is not None:
+            self.expires[key] = self.clock() + self.ttl
+            if self.policy == "ttl":
+                data.move_to_end(key)
+        if self.sizes is not None:
+            self.nbytes += size - self.sizes.get(key, 0)
+            self.sizes[key] = size
+        if dirty:
+            self.dirty.add(key)
+        else:
+            self.dirty.discard(key)
+        self._evict()
+
+    def _evict(self, entries=0, size=0):
+        # until `entries` more entries of `size` more bytes fit
+        while self.data and (
+                (self.max_entries is not None and len(self.data) + entries > self.max_entries)
+                or (self.max_bytes is not None and self.nbytes + size > self.max_bytes)):
+            self._drop(self._victim(), save=True)
+            self.evictions += 1
+
+    def _victim(self):
+        if self.policy != "lfu":
+            return next(iter(self.data))
+        if self.min_freq not in self.buckets:
+            self.min_freq = min(self.buckets)  # only after pop()s emptied it
+        return next(iter(self.buckets[self.min_freq]))
+
+    def _bump(self, key):
+        uses = self.freq[key]
+        bucket = self.buckets[uses]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[uses]
+            if self.min_freq == uses:
+                self.min_freq = uses + 1
+        self.freq[key] = uses + 1
+        self.buckets.setdefault(uses + 1, {})[key] = None
+
+    def _drop(self, key, save=False):
+        value = self.data.pop(key)
+        if key in self.dirty:
+            self.dirty.remove(key)
+            if save and self.writer is not None:
+                self.writer(key, value)
+        if self.policy == "lfu":
+            uses = self.freq.pop(key)
+            bucket = self.buckets[uses]
+            del bucket[key]
+            if not bucket:
+                del self.buckets[uses]
+        if self.expires is not None:
+            del self.expires[key]
+        if self.sizes is not None:
+            self.nbytes -= self.sizes.pop(key)
+        return value
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(21)
+
+    # correctness on small cases
+    lru = Cache(max_entries=2)
+    lru["a"], lru["b"] = 1, 2
+    lru["a"]
+    lru["c"] = 3
+    assert "b" not in lru and lru.keys() == ["a", "c"] and lru.evictions == 1
+    lfu = Cache(max_entries=2, policy="lfu")
+    lfu["a"], lfu["b"] = 1, 2
+    lfu["b"], lfu["b"], lfu["a"]
+    lfu["c"] = 3
+    assert "a" not in lfu and "b" in lfu
+    now = [0.0]
+    ttl = Cache(ttl=10, policy="ttl", clock=lambda: now[0])
+    ttl["a"] = 1
+    now[0] = 11
+    assert ttl.get("a") is None and ttl.expirations == 1
+    written = {}
+    late = Cache(ttl=10, clock=lambda: now[0], writer=written.__setitem__, write_back=True)
+    late["a"], late["b"] = 1, 2
+    now[0] = 22
+    assert late.get("a") is None and written == {"a": 1}
+    assert len(late) == 0 and late.keys() == [] and written == {"a": 1, "b": 2}
+    written = {}
+    back = Cache(max_entries=1, writer=written.__setitem__, write_back=True)
+    back["a"], back["b"] = 1, 2
+    assert written == {"a": 1}
+    back.flush()
+    assert written == {"a": 1, "b": 2}
+    sized = Cache(max_bytes=100, sizeof=len)
+    sized["a"], sized["b"] = "x" * 60, "y" * 30
+    sized["c"] = "z" * 30
+    assert list(sized.keys()) == ["b", "c"] and sized.nbytes == 60
+
+    # hit path against a plain dict
+    keys = list(range(1000))
+    raw = dict.fromkeys(keys, "record")
+    wanted = [rng.choice(keys) for _ in range(n)]
+    start = time.perf_counter()
+    for key in wanted:
+        raw.get(key)
+    raw_time = (time.perf_counter() - start) / n
+    print(f"{n:,} hits")
+    print(f"dict.get            : {raw_time * 1e9:7.1f} ns")
+    for label, cache in (("Cache lru", Cache(max_entries=2000)),
+                         ("Cache lfu", Cache(max_entries=2000, policy="lfu")),
+                         ("Cache ttl=60", Cache(ttl=60, policy="ttl"))):
+        for key in keys:
+            cache[key] = "record"
+        start = time.perf_counter()
+        for key in wanted:
+            cache.get(key)
+        took = (time.perf_counter() - start) / n
+        assert cache.hits == n
+        print(f"{label:20s}: {took * 1e9:7.1f} ns  (+{(took - raw_time) * 1e9:.0f} ns)")
+
+    # read-through in front of an on-disk store, skewed access like real users
+    folder = tempfile.mkdtemp(prefix="cache_")
+    base = os.path.join(folder, "students")
+    try:
+        with MmapDict(base) as store:
+            for i in range(20_000):
+                store[i] = {"name": f"student{i}", "age": 18 + i % 10, "gpa": i % 40 / 10}
+            reads = [min(int(rng.paretovariate(1.1)), 19_999) for _ in range(100_000)]
+            start = time.perf_counter()
+            for key in reads:
+                store[key]
+            disk_time = (time.perf_counter() - start) / len(reads)
+            print(f"MmapDict read       : {disk_time * 1e6:7.2f} us")
+            for policy in ("lru", "lfu"):
+                cache = Cache(max_entries=500, policy=policy, loader=store.__getitem__)
+                start = time.perf_counter()
+                for key in reads:
+                    assert cache[key]["age"] == 18 + key % 10
+                took = (time.perf_counter() - start) / len(reads)
+                print(f"read-through {policy}    : {took * 1e6:7.2f} us  "
+                      f"hit rate {cache.stats()['hit_rate']:.1%}")
+    finally:
+        for name in os.listdir(folder):
+            os.remove(os.path.join(folder, name))
+        os.rmdir(folder)
@@ -0,0 +1,76 @@
+import random
+import sys
+import time
+
+from sketches import BloomFilter
+
+
+def dedup(items):
+    # first occurrence of every item, in order, O(n)
+    # (dicts remember insertion order, so this is a hash-based "unique")
+    return list(dict.fromkeys(items))
+
+
+def iter_dedup(items, approximate=False, capacity=10_000_000, error_rate=0.001):
+    """Yields every item the first time it is seen, for any iterator.
+
+    The exact mode remembers each unique item in a set. The approximate
+    mode uses a fixed-size Bloom filter instead: memory does not grow,
+    but about `error_rate` of the unique items get dropped as "seen".
+    """
+    if approximate:
+        seen = BloomFilter(capacity, error_rate)
+        for item in items:
+            if seen.add(item):
+                yield item
+    else:
+        seen = set()
+        add = seen.add
+        for item in items:
+            if item not in seen:
+                add(item)
+                yield item
+
+
+def unique_loop(arr):
+    # the version from list.py, O(n^2)
+    unique = []
+    for i in arr:
+        if i not in unique:
+            unique.append(i)
+    return unique
+
+
+if __name__ == "__main__":
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(3)
+    print(f"{'size':>10} {'list loop':>11} {'dedup':>9} {'iter_dedup':>11} {'bloom':>9}")
+    size = 1_000
+    while size <= largest:
+        ids = [rng.randrange(size // 2) for _ in range(size)]
+        times = []
+
+        if size <= 10_000:
+            start = time.perf_counter()
+            expected = unique_loop(ids)
+            times.append(f"{time.perf_counter() - start:10.3f}s")
+        else:
+            expected = None
+            times.append(f"{'-':>11}")
+
+        start = time.perf_counter()
+        result = dedup(ids)
+        times.append(f"{time.perf_counter() - start:8.3f}s")
+        assert expected is None or result == expected
+
+        start = time.perf_counter()
+        assert list(iter_dedup(iter(ids))) == result
+        times.append(f"{time.perf_counter() - start:10.3f}s")
+
+        start = time.perf_counter()
+        approx = list(iter_dedup(iter(ids), approximate=True, capacity=size))
+        times.append(f"{time.perf_counter() - start:8.3f}s")
+        missed = len(result) - len(approx)
+
+        print(f"{size:>10,} " + " ".join(times) + f"  (bloom dropped {missed} of {len(result):,})")
+        size *= 10
@@ -0,0 +1,167 @@
+import heapq
+import itertools
+import random
+import sys
+import time
+from collections import Counter
+
+from sketches import CountMinSketch
+
+
+class TopN:
+    """The n keys with the highest counts, kept up to date as counts grow.
+
+    A min-heap of n entries: the weakest of the current top n is always
+    at the front, so a new count only has to beat that one. Entries of
+    keys already in the heap are changed in place and the heap is fixed
+    the next time it is needed.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.heap = []  # [count, tie breaker, key]
+        self.entries = {}  # key -> its entry in the heap
+        self.order = itertools.count()
+        self.dirty = False
+
+    def update(self, key, count):
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry[0] = count
+            self.dirty = True
+            return
+        if self.dirty:
+            heapq.heapify(self.heap)
+            self.dirty = False
+        if len(self.heap) < self.n:
+            entry = [count, next(self.order), key]
+            heapq.heappush(self.heap, entry)
+            self.entries[key] = entry
+        elif count > self.heap[0][0]:
+            entry = [count, next(self.order), key]
+            dropped = heapq.heapreplace(self.heap, entry)
+            del self.entries[dropped[2]]
+            self.entries[key] = entry
+
+    def items(self):
+        # (key, count) best first
+        return [(e[2], e[0]) for e in sorted(self.heap, key=lambda e: (-e[0], e[1]))]
+
+
+class FrequencyIndex:
+    """How often every value occurs, counted once, asked many times.
+
+    Building it is one pass over the data; count(x) is then a dict
+    lookup instead of a pass per question like list.count(x). top()
+    gives the `top_n` most frequent values and stays right while
+    add() feeds more values in.
+    """
+
+    def __init__(self, values=(), top_n=10):
+        self.counts = Counter(values)
+        self.top_n = top_n
+        self._rebuild()
+
+    def _rebuild(self):
+        self.top_tracker = TopN(self.top_n)
+        for key, count in heapq.nlargest(self.top_n, self.counts.items(), key=lambda kv: kv[1]):
+            self.top_tracker.update(key, count)
+
+    def add(self, value, times=1):
+        count = self.counts[value] + times
+        self.counts[value] = count
+        if times >= 0:
+            self.top_tracker.update(value, count)
+        else:
+            self._rebuild()  # a count went down, someone else may move up
+        return count
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def count(self, value):
+        return self.counts.get(value, 0)
+
+    def __getitem__(self, value):
+        return self.count(value)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def top(self, n=None):
+        return self.top_tracker.items()[:n]
+
+
+class StreamingFrequency:
+    """FrequencyIndex for streams too big to keep a count per value.
+
+    Counts live in a Count-Min sketch of fixed size (`memory` bytes), so
+    count() may be a little too high but never too low. Only the keys of
+    the current top_n are remembered.
+    """
+
+    def __init__(self, memory=1 << 20, depth=4, top_n=10):
+        self.sketch = CountMinSketch.for_memory(memory, depth)
+        self.top_tracker = TopN(top_n)
+
+    def add(self, value, times=1):
+        count = self.sketch.add(value, times)
+        self.top_tracker.update(value, count)
+        return count
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def count(self, value):
+        return self.sketch.estimate(value)
+
+    def __getitem__(self, value):
+        return self.count(value)
+
+    def top(self, n=None):
+        return self.top_tracker.items()[:n]
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(9)
+    # a few very common values and a long tail, like real ids
+    data = [int(rng.paretovariate(1.2)) for _ in range(n)]
+    keys = list(set(data))[:1000]
+
+    start = time.perf_counter()
+    naive = [data.count(k) for k in keys[:50]]
+    naive_time = (time.perf_counter() - start) / 50
+
+    start = time.perf_counter()
+    index = FrequencyIndex(data)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    answers = [index.count(k) for k in keys]
+    lookup_time = (time.perf_counter() - start) / len(keys)
+    assert answers[:50] == naive
+    assert index.top(5) == Counter(data).most_common(5)
+
+    start = time.perf_counter()
+    for _ in range(100_000):
+        index.add(int(rng.paretovariate(1.2)))
+    add_time = (time.perf_counter() - start) / 100_000
+    exact_top = [k for k, _ in index.counts.most_common(10)]
+    assert [k for k, _ in index.top()] == exact_top
+
+    stream = StreamingFrequency(memory=64 * 1024)
+    start = time.perf_counter()
+    stream.update(data)
+    stream_time = time.perf_counter() - start
+    errors = [stream.count(k) - Counter(data)[k] for k in keys]
+
+    print(f"{n:,} values, {len(index):,} distinct")
+    print(f"list.count per key      : {naive_time * 1e3:9.3f} ms")
+    print(f"FrequencyIndex build    : {build_time * 1e3:9.3f} ms (once)")
+    print(f"FrequencyIndex count    : {lookup_time * 1e6:9.3f} us")
+    print(f"add() keeping top 10    : {add_time * 1e6:9.3f} us")
+    print(f"Count-Min, 64 KB        : {stream_time / n * 1e6:9.3f} us/value, "
+          f"overcount max {max(errors)}, never under: {min(errors) >= 0}")
+    print(f"top 5 stream vs exact   : {[k for k, _ in stream.top(5)]} {exact_top[:5]}")
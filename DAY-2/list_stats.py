@@ -0,0 +1,164 @@
+import heapq
+import math
+import operator
+import random
+import statistics
+import sys
+import time
+from array import array
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+INT64_MAX = 2 ** 63 - 1
+
+
+class RunningStats:
+    """min, max, top-k, sum, mean, variance and counts in one pass.
+
+    Feed it numbers with add() or update() (any iterable, also a
+    generator reading a file). Mean and variance use Welford's method,
+    so they stay accurate without keeping the numbers around.
+    """
+
+    def __init__(self, k=2, count_values=True):
+        self.k = k
+        self.count = 0
+        self.total = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared differences from the mean
+        self.min = None
+        self.max = None
+        self.largest = []  # min-heap with the k largest values
+        self.counts = Counter() if count_values else None
+
+    def add(self, x):
+        self.count += 1
+        self.total += x
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if self.min is None or x < self.min:
+            self.min = x
+        if self.max is None or x > self.max:
+            self.max = x
+        if len(self.largest) < self.k:
+            heapq.heappush(self.largest, x)
+        elif self.largest and x > self.largest[0]:  # empty when k <= 0
+            heapq.heapreplace(self.largest, x)
+        if self.counts is not None:
+            self.counts[x] += 1
+
+    def update(self, values):
+        for x in values:
+            self.add(x)
+        return self
+
+    @property
+    def variance(self):
+        # population variance, like statistics.pvariance()
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    def top(self):
+        # the k largest values, largest first
+        return sorted(self.largest, reverse=True)
+
+    def occurrences(self, x):
+        if self.counts is None:
+            raise ValueError("values were not counted, use count_values=True")
+        return self.counts[x]
+
+
+def stats_of(values, k=2, count_values=True):
+    # array and NumPy inputs go through C loops instead of add()
+    if np is not None and isinstance(values, (np.ndarray, array)):
+        return _numpy_stats(np.asarray(values), k, count_values)
+    if isinstance(values, array):
+        return _array_stats(values, k, count_values)
+    return RunningStats(k, count_values).update(values)
+
+
+def _fill(stats, count, total, mean, m2, low, high, largest, counts):
+    stats.count, stats.total, stats.mean, stats.m2 = count, total, mean, m2
+    stats.min, stats.max = low, high
+    stats.largest = largest
+    heapq.heapify(stats.largest)
+    if stats.counts is not None:
+        stats.counts = counts()
+    return stats
+
+
+def _numpy_stats(values, k, count_values):
+    stats = RunningStats(k, count_values)
+    if values.size == 0:
+        return stats
+    mean = float(values.mean())
+
+    def counts():
+        keys, numbers = np.unique(values, return_counts=True)
+        return Counter(dict(zip(keys.tolist(), numbers.tolist())))
+
+    low, high = values.min().item(), values.max().item()
+    if values.dtype.kind in "iu" and max(abs(low), abs(high)) * values.size > INT64_MAX:
+        total = sum(values.tolist())  # int64 sum could wrap, Python ints cannot
+    else:
+        total = values.sum().item()
+    if k <= 0:
+        largest = values[:0]  # -0 would slice out every value
+    else:
+        largest = np.partition(values, -k)[-k:] if values.size > k else values
+    return _fill(stats, int(values.size), total, mean,
+                 float(((values - mean) ** 2).sum()),
+                 low, high, largest.tolist(), counts)
+
+
+def _array_stats(values, k, count_values):
+    stats = RunningStats(k, count_values)
+    if not values:
+        return stats
+    count = len(values)
+    total = sum(values)
+    mean = total / count
+    if values.typecode in "fd":
+        m2 = math.fsum((x - mean) ** 2 for x in values)
+    else:
+        # whole numbers: sum of squares is exact, so no cancellation error
+        m2 = (count * sum(map(operator.mul, values, values)) - total * total) / count
+    return _fill(stats, count, total, mean, m2, min(values), max(values),
+                 heapq.nlargest(k, values), lambda: Counter(values))
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(5)
+    data = [rng.randint(-1000, 1000) for _ in range(n)]
+    assert stats_of([5, 1, 3], k=0).top() == [] == stats_of(array("l", [5, 1, 3]), k=0).top()
+    if np is not None:
+        assert stats_of(np.array([5, 1, 3]), k=0).top() == []
+
+    start = time.perf_counter()
+    naive = (min(data), max(data), sum(data), sum(data) / len(data),
+             statistics.pvariance(data), sorted(data, reverse=True)[:3], data.count(7))
+    naive_time = time.perf_counter() - start
+
+    inputs = [("list, one pass", data), ("generator", (x for x in data)),
+              ("array", array("l", data))]
+    if np is not None:
+        inputs.append(("numpy", np.array(data)))
+
+    print(f"{'naive (separate passes)':24s}: {naive_time:6.3f}s")
+    for name, values in inputs:
+        start = time.perf_counter()
+        s = stats_of(values, k=3)
+        took = time.perf_counter() - start
+        got = (s.min, s.max, s.total, s.mean, s.variance, s.top(), s.occurrences(7))
+        assert got[:3] == naive[:3] and got[5:] == naive[5:], (name, got, naive)
+        assert math.isclose(got[3], naive[3]) and math.isclose(got[4], naive[4]), name
+        print(f"{name:24s}: {took:6.3f}s")
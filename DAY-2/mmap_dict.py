@@ -0,0 +1,392 @@
+import hashlib
+import mmap
+import os
+import pickle
+import random
+import shelve
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+
+# Two files per store:
+#   <path>.idx  header + open addressing hash table, slot = (hash, offset)
+#   <path>.dat  append-only records: key length, value length, key, value
+# Both are memory-mapped, so opening a store reads nothing up front.
+
+INDEX_HEADER = struct.Struct("<8sQQQ")  # magic, slots, live keys, used slots
+INDEX_MAGIC = b"MMDICT01"
+DATA_MAGIC = b"MMDATA01"
+RECORD = struct.Struct("<II")
+EMPTY, DELETED = 0, 1  # slot offsets are stored +2, these two are not records
+MISSING = object()
+
+
+def encode_key(key):
+    if isinstance(key, str):
+        return b"s" + key.encode()
+    if isinstance(key, bytes):
+        return b"b" + key
+    if isinstance(key, int) and not isinstance(key, bool):
+        return b"i" + str(key).encode()
+    raise TypeError(f"keys must be str, bytes or int, not {type(key).__name__}")
+
+
+def decode_key(raw):
+    kind, body = raw[:1], raw[1:]
+    if kind == b"s":
+        return body.decode()
+    if kind == b"b":
+        return body
+    return int(body)
+
+
+def key_hash(raw):
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "little")
+
+
+class MmapDict:
+    """A dict on disk: get / [] / pop / in / len / keys / items.
+
+    Keys are str, bytes or int, values anything pickle can store.
+    Lookups hash the key, probe the memory-mapped index and read the one
+    record they need; nothing is loaded when the store is opened.
+    Overwritten and deleted values stay in the data file until
+    compact() (or compact_in_background()) rewrites it.
+    """
+
+    def __init__(self, path, slots=1 << 16):
+        self.path = path
+        self.lock = threading.RLock()
+        self.compacting = None  # keys changed while a compaction runs
+        if not os.path.exists(path + ".idx"):
+            self._create_index(path + ".idx", slots)
+            with open(path + ".dat", "wb") as f:
+                f.write(DATA_MAGIC)
+        self._open()
+
+    # files
+
+    @staticmethod
+    def _create_index(path, slots):
+        with open(path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, slots, 0, 0))
+            f.truncate(INDEX_HEADER.size + 16 * slots)
+
+    def _open(self):
+        self.index_file = open(self.path + ".idx", "r+b")
+        self.index_map = mmap.mmap(self.index_file.fileno(), 0)
+        magic, self.nslots, self.count, self.used = INDEX_HEADER.unpack_from(self.index_map)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"{self.path}.idx is not an MmapDict index")
+        self.slots = memoryview(self.index_map)[INDEX_HEADER.size:].cast("Q")
+        self.data_file = open(self.path + ".dat", "r+b")
+        self.data_file.seek(0, os.SEEK_END)
+        self.data_map = mmap.mmap(self.data_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _close_maps(self):
+        self.slots.release()
+        self.index_map.close()
+        self.index_file.close()
+        self.data_map.close()
+        self.data_file.close()
+
+    def _save_header(self):
+        INDEX_HEADER.pack_into(self.index_map, 0, INDEX_MAGIC, self.nslots, self.count, self.used)
+
+    def flush(self):
+        with self.lock:
+            self._save_header()
+            self.index_map.flush()
+            self.data_file.flush()
+
+    def close(self):
+        compacting = self.compacting
+        if compacting is not None and compacting[1] is not threading.current_thread():
+            compacting[1].join()
+        with self.lock:
+            self.flush()
+            self._close_maps()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # records
+
+    def _mapped(self, end):
+        # the map only covers the file as it was; map again after appends
+        if end > len(self.data_map):
+            self.data_file.flush()
+            self.data_map.close()
+            self.data_map = mmap.mmap(self.data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.data_map
+
+    def _read(self, offset):
+        # (key bytes, where the value starts, value length)
+        data = self._mapped(offset + RECORD.size)
+        key_len, value_len = RECORD.unpack_from(data, offset)
+        start = offset + RECORD.size
+        data = self._mapped(start + key_len + value_len)
+        return data[start:start + key_len], start + key_len, value_len
+
+    def _value_at(self, offset):
+        _, start, length = self._read(offset)
+        return pickle.loads(self.data_map[start:start + length])
+
+    def _append(self, raw, value):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        offset = self.data_file.tell()
+        self.data_file.write(RECORD.pack(len(raw), len(data)) + raw + data)
+        return offset
+
+    # hash table
+
+    def _find(self, raw, h):
+        # (slot of the key or None, first free slot on the way)
+        slots, n = self.slots, self.nslots
+        i = h % n
+        free = None
+        for _ in range(n):  # at most once round the table
+            offset = slots[2 * i + 1]
+            if offset == EMPTY:
+                return None, (i if free is None else free)
+            if offset == DELETED:
+                if free is None:
+                    free = i
+            elif slots[2 * i] == h and self._read(offset - 2)[0] == raw:
+                return i, free
+            i = (i + 1) % n
+        return None, free
+
+    def _grow(self):
+        # rebuild the index twice as big, only hashes and offsets move
+        live = [(self.slots[2 * i], self.slots[2 * i + 1]) for i in range(self.nslots)
+                if self.slots[2 * i + 1] > DELETED]
+        nslots = self.nslots * 2
+        tmp = self.path + ".idx.tmp"
+        self._create_index(tmp, nslots)
+        with open(tmp, "r+b") as f, mmap.mmap(f.fileno(), 0) as mm:
+            slots = memoryview(mm)[INDEX_HEADER.size:].cast("Q")
+            for h, offset in live:
+                i = h % nslots
+                while slots[2 * i + 1] != EMPTY:
+                    i = (i + 1) % nslots
+                slots[2 * i], slots[2 * i + 1] = h, offset
+            slots.release()
+            INDEX_HEADER.pack_into(mm, 0, INDEX_MAGIC, nslots, len(live), len(live))
+        self.data_file.flush()
+        self._close_maps()
+        os.replace(tmp, self.path + ".idx")
+        self._open()
+
+    # dict interface
+
+    def __setitem__(self, key, value):
+        raw = encode_key(key)
+        h = key_hash(raw)
+        with self.lock:
+            if (self.used + 1) * 2 > self.nslots:
+                self._grow()
+            offset = self._append(raw, value) + 2
+            self.data_file.flush()  # the slot must not point past the file
+            slot, free = self._find(raw, h)
+            if slot is None:
+                slot = free
+                if self.slots[2 * slot + 1] == EMPTY:
+                    self.used += 1
+                self.count += 1
+            self.slots[2 * slot], self.slots[2 * slot + 1] = h, offset
+            # slots are on disk as soon as they are written, so keep the
+            # header in step with them even if close() never comes
+            self._save_header()
+            if self.compacting is not None:
+                self.compacting[0].add(raw)
+
+    def get(self, key, default=None):
+        raw = encode_key(key)
+        with self.lock:
+            slot, _ = self._find(raw, key_hash(raw))
+            if slot is None:
+                return default
+            return self._value_at(self.slots[2 * slot + 1] - 2)
+
+    def __getitem__(self, key):
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def pop(self, key, default=MISSING):
+        raw = encode_key(key)
+        with self.lock:
+            slot, _ = self._find(raw, key_hash(raw))
+            if slot is None:
+                if default is MISSING:
+                    raise KeyError(key)
+                return default
+            value = self._value_at(self.slots[2 * slot + 1] - 2)
+            self.slots[2 * slot + 1] = DELETED
+            self.count -= 1
+            self._save_header()
+            if self.compacting is not None:
+                self.compacting[0].add(raw)
+            return value
+
+    def __delitem__(self, key):
+        self.pop(key)
+
+    def __contains__(self, key):
+        return self.get(key, MISSING) is not MISSING
+
+    def __len__(self):
+        return self.count
+
+    def _live_offsets(self):
+        for i in range(self.nslots):
+            with self.lock:
+                if i >= self.nslots:
+                    return
+                offset = self.slots[2 * i + 1]
+            if offset > DELETED:
+                yield offset - 2
+
+    def keys(self):
+        # lazy, one slot at a time (in hash order, not insertion order)
+        for offset in self._live_offsets():
+            with self.lock:
+                raw = self._read(offset)[0]
+            yield decode_key(raw)
+
+    __iter__ = keys
+
+    def values(self):
+        for _, value in self.items():
+            yield value
+
+    def items(self):
+        for offset in self._live_offsets():
+            with self.lock:
+                raw = self._read(offset)[0]
+                value = self._value_at(offset)
+            yield decode_key(raw), value
+
+    # compaction
+
+    def compact(self):
+        """Rewrites the data file with only the live values."""
+        changed = set()
+        with self.lock:
+            self.data_file.flush()
+            live = [self.slots[2 * i + 1] - 2 for i in range(self.nslots)
+                    if self.slots[2 * i + 1] > DELETED]
+            self.compacting = (changed, threading.current_thread())
+
+        # copy the records as they were when we started; records are never
+        # changed in place, so this can run while others keep writing
+        tmp_path = self.path + ".dat.tmp"
+        moved = {}
+        with open(tmp_path, "wb") as out, open(self.path + ".dat", "rb") as src:
+            out.write(DATA_MAGIC)
+            for offset in live:
+                src.seek(offset)
+                key_len, value_len = RECORD.unpack(src.read(RECORD.size))
+                body = src.read(key_len + value_len)
+                moved[offset] = (out.tell(), body[:key_len])
+                out.write(RECORD.pack(key_len, value_len) + body)
+
+        with self.lock:
+            self.compacting = None
+            self.data_file.flush()
+            # keys written or deleted meanwhile: carry their newest state over
+            with open(tmp_path, "ab") as out, open(self.path + ".dat", "rb") as src:
+                latest = {}
+                for raw in changed:
+                    slot, _ = self._find(raw, key_hash(raw))
+                    if slot is not None:
+                        src.seek(self.slots[2 * slot + 1] - 2)
+                        key_len, value_len = RECORD.unpack(src.read(RECORD.size))
+                        latest[raw] = (out.tell(), slot)
+                        out.write(RECORD.pack(key_len, value_len) + src.read(key_len + value_len))
+            # scan every slot, the index may have grown in the meantime
+            slots = self.slots
+            for i in range(self.nslots):
+                old = moved.get(slots[2 * i + 1] - 2)
+                if old is not None and old[1] not in changed:
+                    slots[2 * i + 1] = old[0] + 2
+            for new_offset, slot in latest.values():
+                self.slots[2 * slot + 1] = new_offset + 2
+            self.data_map.close()
+            self.data_file.close()
+            os.replace(tmp_path, self.path + ".dat")
+            self.data_file = open(self.path + ".dat", "r+b")
+            self.data_file.seek(0, os.SEEK_END)
+            self.data_map = mmap.mmap(self.data_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._save_header()
+
+    def compact_in_background(self):
+        worker = threading.Thread(target=self.compact, daemon=True)
+        worker.start()
+        return worker
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    reads = 20_000
+    folder = tempfile.mkdtemp(prefix="mmap_dict_")
+    rng = random.Random(11)
+    records = {f"student{i}": {"name": f"student{i}", "age": 18 + i % 10, "gpa": i % 40 / 10}
+               for i in range(n)}
+    wanted = [f"student{rng.randrange(n)}" for _ in range(reads)]
+
+    def timed(label, opener, lookup):
+        start = time.perf_counter()
+        store = opener()
+        opened = time.perf_counter() - start
+        start = time.perf_counter()
+        for key in wanted:
+            assert lookup(store, key) == records[key]
+        per_read = (time.perf_counter() - start) / reads
+        print(f"{label:14s} open {opened * 1e3:9.2f} ms   random read {per_read * 1e6:7.2f} us")
+        return store
+
+    try:
+        base = os.path.join(folder, "students")
+        with MmapDict(base) as store:
+            for key, value in records.items():
+                store[key] = value
+        with shelve.open(os.path.join(folder, "shelf")) as shelf:
+            shelf.update(records)
+        with open(os.path.join(folder, "students.pickle"), "wb") as f:
+            pickle.dump(records, f)
+
+        def load_pickle():
+            with open(os.path.join(folder, "students.pickle"), "rb") as f:
+                return pickle.load(f)
+
+        print(f"{n:,} student records")
+        timed("MmapDict", lambda: MmapDict(base), lambda s, k: s[k]).close()
+        timed("shelve", lambda: shelve.open(os.path.join(folder, "shelf"), "r"),
+              lambda s, k: s[k]).close()
+        timed("pickled dict", load_pickle, lambda s, k: s[k])
+
+        with MmapDict(base) as store:
+            for i in range(0, n, 2):
+                del store[f"student{i}"]
+            before = os.path.getsize(base + ".dat")
+            worker = store.compact_in_background()
+            store["late"] = {"written": "during compaction"}
+            worker.join()
+            assert store["late"] == {"written": "during compaction"}
+            assert len(store) == n - (n + 1) // 2 + 1
+            assert store["student1"] == records["student1"] and "student0" not in store
+            print(f"compaction     {before / 1e6:.1f} MB -> "
+                  f"{os.path.getsize(base + '.dat') / 1e6:.1f} MB")
+    finally:
+        for name in os.listdir(folder):
+            os.remove(os.path.join(folder, name))
+        os.rmdir(folder)
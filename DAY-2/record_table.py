@@ -0,0 +1,343 @@
+import random
+import sys
+import time
+import tracemalloc
+from array import array
+from itertools import accumulate, compress, islice
+
+CHUNK = 4096
+
+# column types a schema can use
+NUMBER_TYPES = {"int8": "b", "int16": "h", "int32": "i", "int64": "q",
+                "float32": "f", "float64": "d", "bool": "b"}
+
+
+class NumberColumn:
+    # one typed array, 1 to 8 bytes a value
+    def __init__(self, typecode, is_bool=False):
+        self.values = array(typecode)
+        self.is_bool = is_bool
+
+    def append(self, value):
+        self.values.append(value)
+
+    def extend(self, values):
+        self.values.extend(values)
+
+    def truncate(self, n):
+        del self.values[n:]
+
+    def __getitem__(self, i):
+        value = self.values[i]
+        return bool(value) if self.is_bool else value
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(map(bool, self.values)) if self.is_bool else iter(self.values)
+
+    def matching(self, test):
+        return array("q", compress(range(len(self)), map(test, self)))
+
+    def take(self, indexes):
+        column = NumberColumn(self.values.typecode, self.is_bool)
+        column.values = array(self.values.typecode, map(self.values.__getitem__, indexes))
+        return column
+
+    def nbytes(self):
+        return len(self.values) * self.values.itemsize
+
+
+class TextColumn:
+    # all strings utf-8 encoded back to back, plus where each one ends
+    def __init__(self):
+        self.data = bytearray()
+        self.ends = array("q")
+
+    def append(self, value):
+        self.data += value.encode()
+        self.ends.append(len(self.data))
+
+    def extend(self, values):
+        encoded = [value.encode() for value in values]
+        if not encoded:
+            return
+        self.ends.extend(accumulate(map(len, encoded), initial=len(self.data)))
+        del self.ends[-len(encoded) - 1]  # the running total started from there
+        self.data += b"".join(encoded)
+
+    def truncate(self, n):
+        del self.data[self.ends[n - 1] if n else 0:]
+        del self.ends[n:]
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self.ends)
+        start = self.ends[i - 1] if i else 0
+        return self.data[start:self.ends[i]].decode()
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __iter__(self):
+        data, start = self.data, 0
+        for end in self.ends:
+            yield data[start:end].decode()
+            start = end
+
+    def matching(self, test):
+        return array("q", compress(range(len(self)), map(test, self)))
+
+    def take(self, indexes):
+        column = TextColumn()
+        column.extend(map(self.__getitem__, indexes))
+        return column
+
+    def nbytes(self):
+        return len(self.data) + len(self.ends) * self.ends.itemsize
+
+
+class CategoryColumn:
+    # dictionary encoded: each distinct string once, rows keep a small code
+    def __init__(self):
+        self.codes = array("B")
+        self.names = []
+        self.code_of = {}
+
+    def append(self, value):
+        code = self.code_of.get(value)
+        if code is None:
+            code = self.code_of[value] = len(self.names)
+            self.names.append(value)
+            if code == 256:
+                self.codes = array("H", self.codes)
+            elif code == 65536:
+                self.codes = array("i", self.codes)
+        self.codes.append(code)
+
+    def extend(self, values):
+        code_of = self.code_of
+        for value in set(values).difference(code_of):
+            self.append(value)  # new names get their code here
+            self.codes.pop()
+        self.codes.extend(map(code_of.__getitem__, values))
+
+    def truncate(self, n):
+        del self.codes[n:]
+
+    def __getitem__(self, i):
+        return self.names[self.codes[i]]
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        return map(self.names.__getitem__, self.codes)
+
+    def matching(self, test):
+        # test each distinct value once, then only compare codes
+        wanted = [bool(test(name)) for name in self.names]
+        return array("q", compress(range(len(self)), map(wanted.__getitem__, self.codes)))
+
+    def take(self, indexes):
+        column = CategoryColumn()
+        column.names = list(self.names)
+        column.code_of = dict(self.code_of)
+        column.codes = array(self.codes.typecode, map(self.codes.__getitem__, indexes))
+        return column
+
+    def nbytes(self):
+        return len(self.codes) * self.codes.itemsize + sum(sys.getsizeof(n) for n in self.names)
+
+
+def make_column(kind):
+    if kind == "text":
+        return TextColumn()
+    if kind == "category":
+        return CategoryColumn()
+    if kind in NUMBER_TYPES:
+        return NumberColumn(NUMBER_TYPES[kind], kind == "bool")
+    raise ValueError(f"unknown column type {kind!r}, use text, category or one of "
+                     f"{', '.join(NUMBER_TYPES)}")
+
+
+class Row:
+    """One row of a RecordTable, made only when asked for.
+
+    Reads go to the table's columns: row.name, row["name"], row.as_dict().
+    """
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def __getattr__(self, name):
+        try:
+            return self.table.columns[name][self.index]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, name):
+        return self.table.columns[name][self.index]
+
+    def as_dict(self):
+        return {name: column[self.index] for name, column in self.table.columns.items()}
+
+    def __repr__(self):
+        return f"Row({self.as_dict()})"
+
+
+class RecordTable:
+    """Records stored column by column instead of one dict per record.
+
+    The schema names each field and its type:
+
+        students = RecordTable({"name": "text", "age": "int8",
+                                "grade": "category", "gpa": "float32"})
+
+    Numbers live in typed arrays, "text" strings are packed utf-8 and
+    "category" strings (few distinct values, like grades or countries)
+    are stored once with a 1-2 byte code per row. table[i] gives a Row
+    proxy; iter_rows(), where() and select() work on the columns
+    directly and never build a per-row object.
+    """
+
+    def __init__(self, schema, rows=()):
+        self.schema = dict(schema)
+        self.columns = {name: make_column(kind) for name, kind in self.schema.items()}
+        self.extend(rows)
+
+    def append(self, row):
+        # a dict like the ones in dict.py, or a tuple in schema order
+        if isinstance(row, dict):
+            row = [row[name] for name in self.columns]
+        elif len(row) != len(self.columns):
+            raise ValueError(f"row has {len(row)} fields, the schema {len(self.columns)}")
+        length = len(self)
+        try:
+            for column, value in zip(self.columns.values(), row):
+                column.append(value)
+        except Exception:
+            self._truncate(length)  # a value did not fit, keep the columns aligned
+            raise
+
+    def _truncate(self, n):
+        for column in self.columns.values():
+            column.truncate(n)
+
+    def extend(self, rows):
+        # a few thousand rows at a time, turned into columns
+        rows = iter(rows)
+        names = list(self.columns)
+        while True:
+            chunk = list(islice(rows, CHUNK))
+            if not chunk:
+                return
+            if isinstance(chunk[0], dict):
+                chunk = [[row[name] for name in names] for row in chunk]
+            elif any(len(row) != len(names) for row in chunk):
+                raise ValueError(f"every row needs {len(names)} fields, one per column")
+            length = len(self)
+            try:
+                for column, values in zip(self.columns.values(), zip(*chunk)):
+                    column.extend(values)
+            except Exception:
+                self._truncate(length)
+                raise
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError("row index out of range")
+        return Row(self, i % len(self))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield Row(self, i)
+
+    def column(self, name):
+        # the values of one field, in row order
+        return self.columns[name]
+
+    def iter_rows(self, *names):
+        # tuples of the named fields (all if none), like
+        # `for i in people: print(i.name, i.country)`
+        return zip(*(self.columns[name] for name in (names or self.columns)))
+
+    def select(self, *names):
+        # projection: a table of only these fields, sharing their columns
+        table = RecordTable({})
+        table.schema = {name: self.schema[name] for name in names}
+        table.columns = {name: self.columns[name] for name in names}
+        return table
+
+    def where(self, name, test):
+        # the rows where test(value of field `name`) is true, as a new table
+        return self.take(self.columns[name].matching(test))
+
+    def take(self, indexes):
+        table = RecordTable({})
+        table.schema = dict(self.schema)
+        table.columns = {name: column.take(indexes) for name, column in self.columns.items()}
+        return table
+
+    def nbytes(self):
+        return sum(column.nbytes() for column in self.columns.values())
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(22)
+    schema = {"name": "text", "age": "int8", "grade": "category", "gpa": "float32"}
+
+    def students():
+        for i in range(n):
+            yield {"name": f"student{i}", "age": rng.randint(17, 30),
+                   "grade": rng.choice("ABCDF"), "gpa": round(rng.uniform(1.0, 4.0), 1)}
+
+    people = RecordTable({"name": "text", "country": "category"},
+                         [("satheesh", "india"), ("ammulu", "uk"), ("mouni", "germany")])
+    assert list(people.iter_rows("name", "country"))[1] == ("ammulu", "uk")
+    assert people[2].country == "germany" and people[-1]["name"] == "mouni"
+
+    tracemalloc.start()
+    dicts = list(students())
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    rng.seed(22)
+    tracemalloc.start()
+    table = RecordTable(schema, students())
+    table_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert table[12345].as_dict()["name"] == dicts[12345]["name"]
+    first = next(table.select("name", "age").iter_rows())
+    assert first == (dicts[0]["name"], dicts[0]["age"])
+
+    start = time.perf_counter()
+    honours = [s for s in dicts if s["gpa"] >= 3.5]
+    dict_filter = time.perf_counter() - start
+    start = time.perf_counter()
+    table_honours = table.where("gpa", lambda gpa: gpa >= 3.5)
+    table_filter = time.perf_counter() - start
+    assert len(honours) == len(table_honours)
+
+    start = time.perf_counter()
+    dict_a = sum(1 for s in dicts if s["grade"] == "A")
+    dict_count = time.perf_counter() - start
+    start = time.perf_counter()
+    table_a = len(table.column("grade").matching(lambda g: g == "A"))
+    table_count = time.perf_counter() - start
+    assert dict_a == table_a
+
+    print(f"{n:,} student records")
+    print(f"list of dicts : {dict_bytes / 1e6:8.1f} MB  "
+          f"gpa filter {dict_filter:6.3f}s  grade count {dict_count:6.3f}s")
+    print(f"RecordTable   : {table_bytes / 1e6:8.1f} MB  "
+          f"gpa filter {table_filter:6.3f}s  grade count {table_count:6.3f}s")
+    print(f"memory        : {dict_bytes / table_bytes:.1f}x smaller")
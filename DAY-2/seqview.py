@@ -0,0 +1,105 @@
+import sys
+import time
+import tracemalloc
+from array import array
+
+
+class SeqView:
+    """A slice of a list, array, bytes or memoryview that copies nothing.
+
+    The view only keeps the base sequence plus a `range` of the indexes
+    it covers, so slicing, reversing and striding a view make a new
+    range object in O(1), whatever the length. Items are read from the
+    base when asked for; materialize() makes a real copy.
+
+    The view does not notice when items are inserted or removed from a
+    list base, only changes to existing positions.
+    """
+
+    __slots__ = ("base", "indexes")
+
+    def __init__(self, base, indexes=None):
+        self.base = base
+        self.indexes = range(len(base)) if indexes is None else indexes
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return SeqView(self.base, self.indexes[key])
+        return self.base[self.indexes[key]]
+
+    def __setitem__(self, index, value):
+        self.base[self.indexes[index]] = value
+
+    def __iter__(self):
+        base = self.base
+        for i in self.indexes:
+            yield base[i]
+
+    def __reversed__(self):
+        return iter(self.reversed())
+
+    def reversed(self):
+        return SeqView(self.base, self.indexes[::-1])
+
+    def __eq__(self, other):
+        if isinstance(other, SeqView):
+            other = other.materialize()
+        return self.materialize() == other
+
+    def __repr__(self):
+        r = self.indexes
+        return f"SeqView({type(self.base).__name__}, range({r.start}, {r.stop}, {r.step}))"
+
+    def as_slice(self):
+        # the same items as one slice object on the base
+        r = self.indexes
+        if not r:
+            return slice(0, 0)
+        stop = r.start + len(r) * r.step
+        return slice(r.start, None if stop < 0 else stop, r.step)
+
+    def materialize(self):
+        # a real copy, the same type as base[...] gives (list, array, bytes, ...)
+        return self.base[self.as_slice()]
+
+    def tolist(self):
+        return list(self.materialize())
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000_000
+    rounds = 1000
+
+    def chain(seq):
+        # reverse, stride, cut the ends, stride again
+        return seq[::-1][::2][1000:-1000][::3]
+
+    small = list(range(1, 10_001))
+    assert chain(SeqView(small)).materialize() == chain(small)
+    assert list(SeqView(small)[-5:2:-7]) == small[-5:2:-7]
+
+    for name, base in (("bytes", bytes(n)), ("array('b')", array("b", bytes(n))),
+                       ("memoryview", memoryview(bytearray(n)))):
+        tracemalloc.start()
+        start = time.perf_counter()
+        copy = chain(base)
+        copy_time = time.perf_counter() - start
+        copy_peak = tracemalloc.get_traced_memory()[1]
+        del copy
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        for _ in range(rounds):
+            view = chain(SeqView(base))
+        view_time = (time.perf_counter() - start) / rounds
+        view_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(f"{name:11s} {n:,} items: slicing copies {copy_time * 1e3:9.2f} ms "
+              f"{copy_peak / 1e6:8.1f} MB | SeqView {view_time * 1e6:6.2f} us "
+              f"{view_peak / 1e3:6.1f} KB ({len(view):,} items)")
+        del base
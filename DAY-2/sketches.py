@@ -0,0 +1,363 @@
+import hashlib
+import math
+import operator
+import random
+import struct
+import sys
+import time
+from array import array
+
+
+def to_bytes(item):
+    # stable across processes, unlike hash() on strings. A type tag goes
+    # first so 1, "1" and b"1" stay apart, while numbers a set treats as
+    # one item (1, 1.0, True), also inside tuples, give the same bytes.
+    # Other types go by repr(), so only equal reprs match there.
+    if isinstance(item, bytes):
+        return b"b" + item
+    if isinstance(item, str):
+        return b"s" + item.encode()
+    if isinstance(item, int):
+        return b"i" + str(int(item)).encode()  # any size, no float() involved
+    if isinstance(item, float):
+        if math.isfinite(item) and item.is_integer():
+            return b"i" + str(int(item)).encode()
+        return b"f" + repr(item).encode()
+    if isinstance(item, tuple):
+        # each part length-prefixed, so ("ab", "c") and ("a", "bc") differ
+        parts = [to_bytes(part) for part in item]
+        return b"t" + b"".join(len(part).to_bytes(8, "little") + part for part in parts)
+    return b"r" + type(item).__name__.encode() + b":" + repr(item).encode()
+
+
+def hash_pair(item):
+    value = int.from_bytes(hashlib.blake2b(to_bytes(item), digest_size=16).digest(), "little")
+    return value & 0xFFFFFFFFFFFFFFFF, value >> 64 | 1
+
+
+class Sketch:
+    """What BloomFilter, HyperLogLog and CountMinSketch share.
+
+    add(item) and update(items) feed it. merge(other) (or |=) folds in
+    a sketch of the same shape built elsewhere, say by another worker;
+    a | b gives a merged copy. to_bytes() / from_bytes() pass it around
+    as a few plain bytes.
+    """
+
+    MAGIC = b""
+    HEADER = struct.Struct("<8s")
+
+    def update(self, items):
+        for item in items:
+            self.add(item)
+        return self
+
+    def __ior__(self, other):
+        return self.merge(other)
+
+    def __or__(self, other):
+        # merged into a copy, both stay as they are
+        return type(self).from_bytes(self.to_bytes()).merge(other)
+
+    def _check_shape(self, other, *fields):
+        if type(other) is not type(self) or any(
+                getattr(self, f) != getattr(other, f) for f in fields):
+            raise ValueError(f"can only merge a {type(self).__name__} with the same "
+                             f"{', '.join(fields)}")
+
+    @classmethod
+    def _split(cls, data):
+        # the header fields after the magic, and the payload
+        data = memoryview(data)
+        fields = cls.HEADER.unpack_from(data)
+        if fields[0] != cls.MAGIC:
+            raise ValueError(f"not a serialized {cls.__name__}")
+        return fields[1:], data[cls.HEADER.size:]
+
+
+class BloomFilter(Sketch):
+    """Approximate set: `in` can say yes for an item never added (with
+    probability about `error_rate` once `capacity` items are in), but
+    never says no for an item that was added. Memory is fixed up front.
+    """
+
+    MAGIC = b"BLOOM001"
+    HEADER = struct.Struct("<8sQdQQQ")  # capacity, error rate, bits, hashes, count
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.steps = range(self.hashes)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # double hashing: k positions out of one 128 bit hash
+        h1, h2 = hash_pair(item)
+        size = self.size
+        return [(h1 + i * h2) % size for i in self.steps]
+
+    def add(self, item):
+        # returns True if the item was (probably) not there before
+        bits = self.bits
+        new = False
+        for pos in self._positions(item):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def __len__(self):
+        # items added that were not already (seemingly) in the filter
+        return self.count
+
+    def merge(self, other):
+        # the union: every bit set in either
+        self._check_shape(other, "size", "hashes")
+        bits = int.from_bytes(self.bits, "little") | int.from_bytes(other.bits, "little")
+        self.bits = bytearray(bits.to_bytes(len(self.bits), "little"))
+        # which items were in both is unknown, so estimate from the bits set
+        unset = 1 - bits.bit_count() / self.size
+        self.count = (round(-self.size / self.hashes * math.log(unset)) if unset > 0
+                      else self.count + other.count)
+        return self
+
+    def nbytes(self):
+        return len(self.bits)
+
+    def to_bytes(self):
+        return self.HEADER.pack(self.MAGIC, self.capacity, self.error_rate, self.size,
+                                self.hashes, self.count) + self.bits
+
+    @classmethod
+    def from_bytes(cls, data):
+        (capacity, error_rate, size, hashes, count), payload = cls._split(data)
+        bloom = cls(capacity, error_rate)
+        if (bloom.size, bloom.hashes) != (size, hashes):
+            raise ValueError("BloomFilter bytes do not match its capacity and error rate")
+        if len(payload) != (size + 7) // 8:
+            raise ValueError("BloomFilter bytes do not match its size")
+        bloom.bits = bytearray(payload)
+        bloom.count = count
+        return bloom
+
+
+class HyperLogLog(Sketch):
+    """Approximate count of distinct items in 2 ** precision bytes.
+
+    Each item's hash picks a register, which keeps the longest run of
+    leading zero bits seen there; len() turns the registers into a
+    count that is off by about 1.04 / sqrt(2 ** precision) however many
+    items went in (1.6% in 4 KB at the default error_rate).
+    """
+
+    MAGIC = b"HLOGLOG1"
+    HEADER = struct.Struct("<8sB")  # precision
+    POWERS = [2.0 ** -rank for rank in range(66)]
+
+    def __init__(self, error_rate=0.02):
+        self.error_rate = error_rate
+        self.precision = min(18, max(4, math.ceil(math.log2((1.04 / error_rate) ** 2))))
+        self.registers = bytearray(1 << self.precision)
+        self.shift = 64 - self.precision
+
+    def add(self, item):
+        # returns True if a register grew, so the count may have changed
+        h1 = hash_pair(item)[0]
+        register = h1 >> self.shift
+        rank = self.shift - (h1 & ((1 << self.shift) - 1)).bit_length() + 1
+        if rank > self.registers[register]:
+            self.registers[register] = rank
+            return True
+        return False
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / math.fsum(map(self.POWERS.__getitem__, self.registers))
+        empty = self.registers.count(0)
+        if estimate <= 2.5 * m and empty:
+            return m * math.log(m / empty)  # few items: linear counting is better
+        return estimate
+
+    def __len__(self):
+        return round(self.count())
+
+    def merge(self, other):
+        # the union: the larger of each pair of registers
+        self._check_shape(other, "precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def nbytes(self):
+        return len(self.registers)
+
+    def to_bytes(self):
+        return self.HEADER.pack(self.MAGIC, self.precision) + self.registers
+
+    @classmethod
+    def from_bytes(cls, data):
+        (precision,), payload = cls._split(data)
+        if len(payload) != 1 << precision:
+            raise ValueError("HyperLogLog bytes do not match its precision")
+        hll = cls()
+        hll.error_rate = 1.04 / math.sqrt(1 << precision)
+        hll.precision, hll.shift = precision, 64 - precision
+        hll.registers = bytearray(payload)
+        return hll
+
+
+class CountMinSketch(Sketch):
+    """Approximate counts for an unbounded stream in fixed memory.
+
+    `depth` rows of `width` counters; an item bumps one counter per row
+    and its estimate is the smallest of them. Estimates are never too
+    low, and too high by at most about 2/width of the total count (with
+    high probability).
+    """
+
+    MAGIC = b"CMSKETCH"
+    HEADER = struct.Struct("<8sQQq")  # width, depth, total
+
+    def __init__(self, width=2 ** 16, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = array("q", bytes(8 * width * depth))
+        self.offsets = [row * width for row in range(depth)]
+        self.total = 0
+
+    @classmethod
+    def for_memory(cls, nbytes, depth=4):
+        # as wide as fits in nbytes with 8 byte counters
+        return cls(max(1, nbytes // (8 * depth)), depth)
+
+    def _cells(self, item):
+        h1, h2 = hash_pair(item)
+        width = self.width
+        return [offset + (h1 + row * h2) % width for row, offset in enumerate(self.offsets)]
+
+    def add(self, item, count=1):
+        # returns the new estimate for the item
+        table = self.table
+        estimate = None
+        for cell in self._cells(item):
+            table[cell] += count
+            if estimate is None or table[cell] < estimate:
+                estimate = table[cell]
+        self.total += count
+        return estimate
+
+    def estimate(self, item):
+        table = self.table
+        return min(table[cell] for cell in self._cells(item))
+
+    def __getitem__(self, item):
+        return self.estimate(item)
+
+    def merge(self, other):
+        # counts from both streams, still never too low
+        self._check_shape(other, "width", "depth")
+        self.table = array("q", map(operator.add, self.table, other.table))
+        self.total += other.total
+        return self
+
+    def nbytes(self):
+        return len(self.table) * self.table.itemsize
+
+    def to_bytes(self):
+        table = self.table
+        if sys.byteorder == "big":
+            table = array("q", table)
+            table.byteswap()
+        return self.HEADER.pack(self.MAGIC, self.width, self.depth, self.total) + table.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        (width, depth, total), payload = cls._split(data)
+        sketch = cls(width, depth)
+        sketch.table = array("q")
+        sketch.table.frombytes(payload)
+        if sys.byteorder == "big":
+            sketch.table.byteswap()
+        if len(sketch.table) != width * depth:
+            raise ValueError("CountMinSketch bytes do not match its width and depth")
+        sketch.total = total
+        return sketch
+
+
+def from_bytes(data):
+    # any of the three, told apart by the magic at the front
+    for cls in (BloomFilter, HyperLogLog, CountMinSketch):
+        if bytes(data[:8]) == cls.MAGIC:
+            return cls.from_bytes(data)
+    raise ValueError("not a serialized sketch")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = random.Random(24)
+    assert to_bytes((1, "a")) == to_bytes((1.0, "a")) != to_bytes((1.5, "a"))
+    assert 10 ** 400 in BloomFilter(10).update([10 ** 400])
+    # an event stream: n distinct users, the busy ones seen many times
+    users = [f"user{i}" for i in range(n)]
+    events = [users[min(int(rng.paretovariate(0.8)), n) - 1] for _ in range(n)] + users
+    rng.shuffle(events)
+    half = len(events) // 2
+    exact = set(events)
+    exact_bytes = sys.getsizeof(exact)  # the table only, not the strings
+    print(f"{len(events):,} events, {len(exact):,} distinct, a set of them "
+          f"needs {exact_bytes / 1e6:.1f} MB plus the strings")
+
+    print("\nBloomFilter: memory vs false positives (two workers, merged)")
+    strangers = [f"visitor{i}" for i in range(100_000)]
+    for error_rate in (0.1, 0.01, 0.001):
+        start = time.perf_counter()
+        left = BloomFilter(n, error_rate).update(events[:half])
+        right = BloomFilter(n, error_rate).update(events[half:])
+        took = (time.perf_counter() - start) / len(events)
+        merged = BloomFilter.from_bytes(left.to_bytes()).merge(right)
+        assert all(user in merged for user in users)
+        try:
+            BloomFilter.from_bytes(left.to_bytes()[:-1])
+            raise AssertionError("a cut short BloomFilter was loaded")
+        except ValueError:
+            pass
+        wrong = sum(1 for s in strangers if s in merged) / len(strangers)
+        print(f"  target {error_rate:6.3f}  {merged.nbytes() / 1e3:8.1f} KB  "
+              f"measured {wrong:7.4f}  len {len(merged):,}  {took * 1e6:5.1f} us/add")
+
+    print("\nHyperLogLog: memory vs distinct count error (two workers, merged)")
+    for error_rate in (0.05, 0.02, 0.01, 0.005):
+        start = time.perf_counter()
+        left = HyperLogLog(error_rate).update(events[:half])
+        right = HyperLogLog(error_rate).update(events[half:])
+        took = (time.perf_counter() - start) / len(events)
+        merged = from_bytes(left.to_bytes()) | right
+        error = abs(len(merged) - len(exact)) / len(exact)
+        print(f"  target {error_rate:6.3f}  {merged.nbytes() / 1e3:8.1f} KB  "
+              f"measured {error:7.4f}  ({len(merged):,})  {took * 1e6:5.1f} us/add")
+
+    print("\nCountMinSketch: memory vs overcount (two workers, merged)")
+    counts = {}
+    for event in events:
+        counts[event] = counts.get(event, 0) + 1
+    sample = rng.sample(users, 2000)
+    for memory in (16 << 10, 128 << 10, 1 << 20):
+        start = time.perf_counter()
+        left = CountMinSketch.for_memory(memory).update(events[:half])
+        right = CountMinSketch.for_memory(memory).update(events[half:])
+        took = (time.perf_counter() - start) / len(events)
+        merged = from_bytes(left.to_bytes()) | right
+        over = [merged[user] - counts[user] for user in sample]
+        assert min(over) >= 0 and merged.total == len(events)
+        print(f"  {merged.nbytes() / 1e3:8.1f} KB  mean overcount {sum(over) / len(over):8.2f}  "
+              f"max {max(over):6d}  {took * 1e6:5.1f} us/add")
@@ -0,0 +1,231 @@
+import random
+import re
+import sys
+import time
+from collections import deque
+
+
+class TextBuilder:
+    """Builds one big string out of many small ones.
+
+    s = s + part copies all of s every time, so building a report line
+    by line is quadratic. TextBuilder keeps the parts in a list
+    (amortized O(1) append) and joins them once, when the text is asked
+    for:
+
+        out = TextBuilder()
+        out += "Hello"
+        out.repeat("Ha", 3)
+        str(out)  # "HelloHaHaHa"
+    """
+
+    def __init__(self, text=""):
+        self.parts = [text] if text else []
+        self.length = len(text)
+
+    def append(self, text):
+        self.parts.append(text)
+        self.length += len(text)
+        return self
+
+    def __iadd__(self, text):
+        return self.append(text)
+
+    write = append  # so print(..., file=builder) works too
+
+    def extend(self, texts):
+        for text in texts:
+            self.append(text)
+        return self
+
+    def line(self, text=""):
+        return self.append(text + "\n")
+
+    def repeat(self, text, times):
+        # like "Ha" * 3, without a loop of appends
+        return self.append(text * times)
+
+    def __len__(self):
+        return self.length
+
+    def build(self):
+        if len(self.parts) > 1:
+            self.parts = ["".join(self.parts)]  # join once, reuse next time
+        return self.parts[0] if self.parts else ""
+
+    __str__ = build
+
+    def write_to(self, file):
+        # straight to a file, no joined copy in memory
+        file.writelines(self.parts)
+
+
+class MultiPattern:
+    """Finds, counts and replaces many patterns in one pass (Aho-Corasick).
+
+    Chained str.replace / str.count read the whole text once per
+    pattern; here the patterns are merged into one automaton, so the
+    text is read once however many patterns there are. Matches are
+    taken leftmost first and longest first, never overlapping, the way
+    a regex alternation of the patterns would take them.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = sorted(set(patterns), key=len, reverse=True)
+        if not all(self.patterns):
+            raise ValueError("patterns must not be empty strings")
+        # trie: moves[state] is {char: next state}, state 0 is the root
+        moves, ends = [{}], [0]  # ends: length of the pattern ending at a state
+        for pattern in self.patterns:
+            state = 0
+            for char in pattern:
+                if char not in moves[state]:
+                    moves[state][char] = len(moves)
+                    moves.append({})
+                    ends.append(0)
+                state = moves[state][char]
+            ends[state] = len(pattern)
+
+        # failure links, breadth first; fill each state's moves from its
+        # fallback so scanning never has to follow links
+        fail = [0] * len(moves)
+        self.found = [()] * len(moves)  # lengths of all patterns ending at a state
+        queue = deque(moves[0].values())
+        while queue:
+            state = queue.popleft()
+            back = fail[state]
+            self.found[state] = ((ends[state],) if ends[state] else ()) + self.found[back]
+            for char, child in moves[state].items():
+                fail[child] = moves[back].get(char, 0) if state else 0
+                queue.append(child)
+            if state:
+                moves[state] = {**moves[back], **moves[state]}
+        self.moves = moves
+
+    def _longest_by_start(self, text):
+        # {start: length of the longest pattern starting there}
+        moves, found = self.moves, self.found
+        best = {}
+        state = 0
+        for end, char in enumerate(text, 1):
+            state = moves[state].get(char, 0)
+            for length in found[state]:
+                start = end - length
+                if length > best.get(start, 0):
+                    best[start] = length
+        return best
+
+    def matches(self, text):
+        # (start, matched text), leftmost longest, not overlapping
+        position = 0
+        best = self._longest_by_start(text)
+        for start in sorted(best):
+            if start >= position:
+                position = start + best[start]
+                yield start, text[start:position]
+
+    def find_all(self, text):
+        # every occurrence, overlapping ones too, as (start, pattern)
+        moves, found = self.moves, self.found
+        state = 0
+        for end, char in enumerate(text, 1):
+            state = moves[state].get(char, 0)
+            for length in found[state]:
+                yield end - length, text[end - length:end]
+
+    def count(self, text):
+        # {pattern: times matched} for the patterns found
+        counts = {}
+        for _, match in self.matches(text):
+            counts[match] = counts.get(match, 0) + 1
+        return counts
+
+    def replace(self, text, replacements):
+        # replacements: {pattern: new text} or a function of the match
+        lookup = replacements if callable(replacements) else replacements.__getitem__
+        out = TextBuilder()
+        position = 0
+        for start, match in self.matches(text):
+            out.append(text[position:start]).append(lookup(match))
+            position = start + len(match)
+        return out.append(text[position:]).build()
+
+
+def multi_replace(text, replacements):
+    return MultiPattern(replacements).replace(text, replacements)
+
+
+if __name__ == "__main__":
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = random.Random(25)
+
+    out = TextBuilder("x = ")
+    out += "GFG"
+    out.append("Hello").line().repeat("Ha", 3)
+    assert str(out) == "x = GFGHello\nHaHaHa" and len(out) == len(str(out))
+    greeting = MultiPattern(["World", "l", "Hello"])
+    assert greeting.count("Hello World") == {"Hello": 1, "World": 1}
+    assert greeting.count("all well") == {"l": 4}
+    assert multi_replace("Hello World", {"World": "Python"}) == "Hello Python"
+    assert list(MultiPattern(["he", "she", "his", "hers"]).find_all("ushers")) == \
+        [(1, "she"), (2, "he"), (2, "hers")]
+
+    # building a report of many lines
+    row = "student{0},{1},{2}\n"
+    values = [(i, rng.randint(17, 30), rng.choice("ABCDF")) for i in range(lines)]
+    report = {"text": ""}
+    start = time.perf_counter()
+    for value in values:
+        report["text"] += row.format(*value)  # a second reference: copies every time
+    concat_time = time.perf_counter() - start
+    start = time.perf_counter()
+    out = TextBuilder()
+    for value in values:
+        out += row.format(*value)
+    built = out.build()
+    builder_time = time.perf_counter() - start
+    assert built == report["text"]
+    print(f"{lines:,} report lines")
+    print(f"  report['text'] += line : {concat_time:7.3f}s")
+    print(f"  TextBuilder            : {builder_time:7.3f}s")
+
+    # hundreds of replacements over a text of the same size
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    for patterns in (100, 300, 1000):
+        words = sorted({"".join(rng.choice(letters) for _ in range(rng.randint(4, 9)))
+                        for _ in range(patterns)})
+        text = " ".join(rng.choice(words) + rng.choice(" ,.") for _ in range(lines))
+        replacements = {word: f"<{i}>" for i, word in enumerate(words)}
+        longest_first = sorted(replacements, key=len, reverse=True)
+
+        start = time.perf_counter()
+        chained = text
+        for word in longest_first:
+            chained = chained.replace(word, replacements[word])
+        chained_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        alternation = re.compile("|".join(map(re.escape, longest_first)))
+        regex = alternation.sub(lambda m: replacements[m.group()], text)
+        regex_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        single = MultiPattern(replacements).replace(text, replacements)
+        scan_time = time.perf_counter() - start
+        assert single == regex
+
+        start = time.perf_counter()
+        chained_counts = {word: text.count(word) for word in words}
+        chained_count_time = time.perf_counter() - start
+        start = time.perf_counter()
+        counts = MultiPattern(words).count(text)
+        count_time = time.perf_counter() - start
+
+        print(f"{len(words)} patterns over {len(text) / 1e6:.1f} MB")
+        print(f"  chained str.replace    : {chained_time:7.3f}s"
+              f"{'' if chained == single else '  (differs: earlier words cut into later ones)'}")
+        print(f"  regex alternation      : {regex_time:7.3f}s")
+        print(f"  MultiPattern.replace   : {scan_time:7.3f}s")
+        print(f"  str.count per pattern  : {chained_count_time:7.3f}s")
+        print(f"  MultiPattern.count     : {count_time:7.3f}s  "
+              f"({sum(counts.values()):,} vs {sum(chained_counts.values()):,} matches)")
@@ -0,0 +1,148 @@
+import operator
+import sys
+import time
+from array import array
+from multiprocessing import Pool
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# square / power / affine over whole buffers. Results are exactly what
+# the plain Python loops give: array and NumPy inputs go through NumPy
+# when every result is known to fit in 64 bits, everything else (lists,
+# huge ints) is done with Python ints in chunks. Turning a list into a
+# NumPy array and back costs more than NumPy saves, so lists skip it.
+
+INT64_MAX = 2 ** 63 - 1
+CHUNK = 1 << 16
+
+
+def square_list(numbers):
+    # the loop from list.py
+    result = []
+    for i in numbers:
+        result.append(i ** 2)
+    return result
+
+
+def _python_chunk(job):
+    values, kind, a, b = job
+    if kind == "power":
+        if a == 2:
+            return list(map(operator.mul, values, values))
+        return [x ** a for x in values]
+    return [a * x + b for x in values]
+
+
+def _fits(low, high, kind, a, b):
+    # can int64 hold every result? (floats are fine as they are)
+    if any(isinstance(v, float) for v in (low, high, a, b)):
+        return True
+    bound = max(abs(low), abs(high))
+    if kind == "power":
+        return a >= 0 and bound ** a <= INT64_MAX
+    return abs(a) * bound + abs(b) <= INT64_MAX
+
+
+def _to_numpy(values):
+    if isinstance(values, array):
+        source = np.frombuffer(values, dtype=values.typecode)
+    else:
+        source = np.asarray(values)
+    return source if source.dtype.kind in "iubf" else None
+
+
+def _python(values, kind, a, b, workers):
+    # plain Python ints, in chunks spread over worker processes if asked
+    if not workers or workers < 2:
+        return _python_chunk((values, kind, a, b))
+    jobs = ((values[i:i + CHUNK], kind, a, b) for i in range(0, len(values), CHUNK))
+    with Pool(workers) as pool:
+        return [x for part in pool.imap(_python_chunk, jobs) for x in part]
+
+
+def _apply(values, kind, a, b=0, workers=None):
+    if len(values) == 0:
+        return values[:0]
+
+    source = None
+    if np is not None and isinstance(values, (array, np.ndarray)):
+        source = _to_numpy(values)
+    if source is not None and _fits(source.min().item(), source.max().item(), kind, a, b):
+        if source.dtype.kind in "iub":
+            source = source.astype(np.int64)  # only now: uint64 past 2**63 would wrap
+        result = _numpy(source, kind, a, b)
+        if isinstance(values, np.ndarray):
+            return result
+        if isinstance(values, array):
+            return array("d" if result.dtype.kind == "f" else "q", result.tobytes())
+        return result.tolist()
+
+    if isinstance(values, np.ndarray if np is not None else ()):
+        return np.array(_python(values.tolist(), kind, a, b, workers), dtype=object)
+    result = _python(values, kind, a, b, workers)
+    if isinstance(values, array):
+        try:
+            return array("d" if isinstance(result[0], float) else "q", result)
+        except OverflowError:
+            return result  # too big for any array type, keep the Python ints
+    return result
+
+
+def _numpy(values, kind, a, b):
+    if kind == "power":
+        return values * values if a == 2 else values ** a
+    return a * values + b
+
+
+def square(values, workers=None):
+    return _apply(values, "power", 2, workers=workers)
+
+
+def power(values, exponent, workers=None):
+    return _apply(values, "power", exponent, workers=workers)
+
+
+def affine(values, scale, offset, workers=None):
+    # scale * x + offset for every x
+    return _apply(values, "affine", scale, offset, workers)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    numbers = list(range(-n // 2, n // 2))
+
+    assert square([1, 2, 3, 4, 5, 6, 7]) == [1, 4, 9, 16, 25, 36, 49]
+    big = [3 ** 40, -(3 ** 41), 7]
+    assert square(big) == square_list(big) and power(big, 3) == [x ** 3 for x in big]
+    assert affine(array("q", [1, -2]), 3, 1) == array("q", [4, -5])
+    assert list(square(array("Q", [2 ** 64 - 1, 3]))) == [(2 ** 64 - 1) ** 2, 9]
+
+    start = time.perf_counter()
+    expected = square_list(numbers)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    comprehension = [x * x for x in numbers]
+    comp_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = square(numbers)
+    square_time = time.perf_counter() - start
+    assert result == expected == comprehension
+
+    buffer = array("q", numbers)
+    start = time.perf_counter()
+    squared = square(buffer)
+    buffer_time = time.perf_counter() - start
+    assert squared.tolist() == expected
+
+    path = "numpy" if np is not None else "array"
+    print(f"{n:,} ints squared")
+    print(f"square_list loop    : {loop_time:7.3f}s")
+    print(f"list comprehension  : {comp_time:7.3f}s")
+    print(f"square(list)        : {square_time:7.3f}s")
+    print(f"square(array) {path:5s} : {buffer_time:7.3f}s")
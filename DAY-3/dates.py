@@ -0,0 +1,164 @@
+import datetime
+import sys
+import time
+
+from problems import is_leap
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Day ordinals use the same numbering as datetime.date.toordinal():
+# 1 = 1 January of year 1. Everything below is table lookups and a few
+# divisions, no loops over years or months.
+
+DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# DAYS_BEFORE_MONTH[leap][month] = days in the year before that month
+DAYS_BEFORE_MONTH = tuple(
+    tuple([0] + [sum(DAYS_IN_MONTH[1:m]) + (leap and m > 2) for m in range(1, 13)])
+    for leap in (0, 1)
+)
+
+# MONTH_DAY[leap][day of year, 0 based] = (month, day)
+MONTH_DAY = tuple(
+    tuple((m, d) for m in range(1, 13)
+          for d in range(1, DAYS_IN_MONTH[m] + (leap and m == 2) + 1))
+    for leap in (0, 1)
+)
+
+DAYS_IN_400_YEARS = 146097
+DAYS_IN_100_YEARS = 36524
+DAYS_IN_4_YEARS = 1461
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+def days_in_month(year, month):
+    return DAYS_IN_MONTH[month] + (month == 2 and is_leap(year))
+
+
+def to_ordinal(year, month, day):
+    if not 1 <= month <= 12:
+        raise ValueError("month must be in 1..12")
+    if not 1 <= day <= days_in_month(year, month):
+        raise ValueError("day is out of range for month")
+    y = year - 1
+    return (y * 365 + y // 4 - y // 100 + y // 400
+            + DAYS_BEFORE_MONTH[is_leap(year)][month] + day)
+
+
+def from_ordinal(ordinal):
+    # split into whole 400, 100, 4 and 1 year cycles
+    n400, n = divmod(ordinal - 1, DAYS_IN_400_YEARS)
+    n100, n = divmod(n, DAYS_IN_100_YEARS)
+    n4, n = divmod(n, DAYS_IN_4_YEARS)
+    n1, n = divmod(n, 365)
+    year = n400 * 400 + n100 * 100 + n4 * 4 + n1 + 1
+    if n1 == 4 or n100 == 4:
+        # last day of a leap year
+        return year - 1, 12, 31
+    month, day = MONTH_DAY[n1 == 3 and (n4 != 24 or n100 == 3)][n]
+    return year, month, day
+
+
+def weekday(year, month, day):
+    # 0 = Monday ... 6 = Sunday, like datetime.date.weekday()
+    return (to_ordinal(year, month, day) + 6) % 7
+
+
+def day_name(year, month, day):
+    return WEEKDAYS[weekday(year, month, day)]
+
+
+def days_between(first, second):
+    # days from the first (year, month, day) to the second
+    return to_ordinal(*second) - to_ordinal(*first)
+
+
+def add_days(date, days):
+    return from_ordinal(to_ordinal(*date) + days)
+
+
+# batch versions, NumPy arrays in and out (lists when NumPy is missing)
+
+if np is not None:
+    _BEFORE = np.array(DAYS_BEFORE_MONTH, dtype=np.int64)
+    _MONTHS = np.array([[md[0] for md in MONTH_DAY[leap]] + [0] * (1 - leap)
+                        for leap in (0, 1)], dtype=np.int64)
+    _DAYS = np.array([[md[1] for md in MONTH_DAY[leap]] + [0] * (1 - leap)
+                      for leap in (0, 1)], dtype=np.int64)
+
+
+def to_ordinals(years, months, days):
+    # no range checks here, check the inputs first if they are untrusted
+    if np is None:
+        return [to_ordinal(y, m, d) for y, m, d in zip(years, months, days)]
+    years = np.asarray(years, dtype=np.int64)
+    months = np.asarray(months, dtype=np.int64)
+    days = np.asarray(days, dtype=np.int64)
+    leap = (((years & 3) == 0) & (((years % 25) != 0) | ((years & 15) == 0))).astype(np.int64)
+    y = years - 1
+    return y * 365 + y // 4 - y // 100 + y // 400 + _BEFORE[leap, months] + days
+
+
+def from_ordinals(ordinals):
+    # returns (years, months, days)
+    if np is None:
+        dates = [from_ordinal(n) for n in ordinals]
+        return [d[0] for d in dates], [d[1] for d in dates], [d[2] for d in dates]
+    n400, n = np.divmod(np.asarray(ordinals, dtype=np.int64) - 1, DAYS_IN_400_YEARS)
+    n100, n = np.divmod(n, DAYS_IN_100_YEARS)
+    n4, n = np.divmod(n, DAYS_IN_4_YEARS)
+    n1, n = np.divmod(n, 365)
+    years = n400 * 400 + n100 * 100 + n4 * 4 + n1 + 1
+
+    last_day = (n1 == 4) | (n100 == 4)
+    leap = ((n1 == 3) & ((n4 != 24) | (n100 == 3))).astype(np.int64)
+    n = np.where(last_day, 0, n)
+    months = np.where(last_day, 12, _MONTHS[leap, n])
+    days = np.where(last_day, 31, _DAYS[leap, n])
+    years = np.where(last_day, years - 1, years)
+    return years, months, days
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    first = datetime.date(1, 1, 1).toordinal()
+    last = datetime.date(9999, 12, 31).toordinal()
+    step = max(1, (last - first) // n)
+    ordinals = range(first, last + 1, step)
+
+    for k in list(range(1, 3000)) + list(range(first, last + 1, 997)) + [last]:
+        d = datetime.date.fromordinal(k)
+        assert from_ordinal(k) == (d.year, d.month, d.day)
+        assert to_ordinal(d.year, d.month, d.day) == k
+        assert weekday(d.year, d.month, d.day) == d.weekday()
+
+    start = time.perf_counter()
+    for k in ordinals:
+        d = datetime.date.fromordinal(k)
+        d.toordinal()
+    date_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for k in ordinals:
+        to_ordinal(*from_ordinal(k))
+    our_time = time.perf_counter() - start
+
+    calls = len(ordinals)
+    print(f"{calls:,} round trips ordinal -> date -> ordinal")
+    print(f"datetime.date      : {date_time / calls * 1e9:7.0f} ns/round trip")
+    print(f"from/to_ordinal    : {our_time / calls * 1e9:7.0f} ns/round trip")
+
+    if np is not None:
+        big = np.arange(first, last + 1, dtype=np.int64)
+        big = np.concatenate([big] * (10_000_000 // len(big) + 1))[:10_000_000]
+        start = time.perf_counter()
+        years, months, days = from_ordinals(big)
+        back = to_ordinals(years, months, days)
+        batch_time = time.perf_counter() - start
+        assert (back == big).all()
+        print(f"batch (10M)        : {batch_time / len(big) * 1e9:7.0f} ns/round trip")
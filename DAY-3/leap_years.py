@@ -0,0 +1,85 @@
+import sys
+import time
+from array import array
+
+from problems import is_leap
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# same Gregorian rule as is_leap():
+#   divisible by 4 and not by 100, or divisible by 400
+
+
+CHUNK = 1 << 16  # small enough for the temporaries to stay in the CPU cache
+
+
+def _mask_numpy(years):
+    # once y % 4 == 0: y % 100 == 0 is y % 25 == 0, and y % 400 == 0
+    # is that plus y % 16 == 0, so only one real division is needed
+    return ((years & 3) == 0) & (((years % 25) != 0) | ((years & 15) == 0))
+
+
+def leap_mask(years):
+    # True/False for every year, a NumPy bool array when NumPy is installed
+    if np is not None:
+        years = np.asarray(years)
+        mask = np.empty(years.shape, dtype=bool)
+        flat_years, flat_mask = years.reshape(-1), mask.reshape(-1)
+        for i in range(0, flat_years.size, CHUNK):
+            flat_mask[i:i + CHUNK] = _mask_numpy(flat_years[i:i + CHUNK])
+        return mask
+    return array("b", (((y % 4 == 0 and y % 100 != 0) or y % 400 == 0) for y in years))
+
+
+def leap_years_upto(year):
+    # how many leap years in [1, year] (negative for years before 1)
+    return year // 4 - year // 100 + year // 400
+
+
+def count_leap_years(first, last):
+    # how many leap years in [first, last], O(1) for any range
+    if last < first:
+        return 0
+    return leap_years_upto(last) - leap_years_upto(first - 1)
+
+
+def count_leap(years):
+    if np is not None:
+        years = np.asarray(years).reshape(-1)
+        return sum(int(np.count_nonzero(_mask_numpy(years[i:i + CHUNK])))
+                   for i in range(0, years.size, CHUNK))
+    return sum(leap_mask(years))
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    first = -n // 2
+
+    for a in range(-1000, 1000, 7):
+        for b in range(a - 3, a + 900, 31):
+            assert count_leap_years(a, b) == sum(is_leap(y) for y in range(a, b + 1))
+
+    start = time.perf_counter()
+    loop_count = sum(1 for y in range(first, first + n) if is_leap(y))
+    loop_time = time.perf_counter() - start
+
+    years = np.arange(first, first + n, dtype=np.int64) if np is not None else range(first, first + n)
+    start = time.perf_counter()
+    mask_count = count_leap(years)
+    mask_time = time.perf_counter() - start
+    assert mask_count == sum(leap_mask(years))
+
+    start = time.perf_counter()
+    range_count = count_leap_years(first, first + n - 1)
+    range_time = time.perf_counter() - start
+
+    assert loop_count == mask_count == range_count
+    path = "numpy" if np is not None else "array"
+    print(f"{n:,} years, {loop_count:,} leap years")
+    print(f"is_leap loop      : {loop_time:8.3f}s")
+    print(f"count_leap ({path}): {mask_time:8.3f}s ({loop_time / mask_time:.0f}x faster)")
+    print(f"count_leap_years  : {range_time * 1e6:8.1f} us")
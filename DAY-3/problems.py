@@ -37,6 +37,7 @@ def is_leap(year):
     else:
         return False
     
-year=int(input("enter a year"))
-result=is_leap(year)
-print(result)
\ No newline at end of file
+if __name__ == "__main__":
+    year=int(input("enter a year"))
+    result=is_leap(year)
+    print(result)
\ No newline at end of file
@@ -0,0 +1,146 @@
+import io
+import mmap
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+from patterns import PATTERNS, render
+
+
+# Where a row starts in the output can be worked out without building the
+# rows before it, because all numbers with the same digit count take the
+# same room. With those offsets every worker process writes its own rows
+# straight into a shared memory-mapped file.
+
+
+def _digit_groups(m):
+    # (digits, first, last) for the numbers 1..m
+    digits, first = 1, 1
+    while first <= m:
+        last = min(first * 10 - 1, m)
+        yield digits, first, last
+        digits, first = digits + 1, first * 10
+
+
+def _range_sum(first, last):
+    return (first + last) * (last - first + 1) // 2
+
+
+def repeated_bytes(m):
+    # rows 1..m of "i i i \n": i numbers of (digits + 1) bytes, plus "\n"
+    return sum((d + 1) * _range_sum(a, b) + (b - a + 1) for d, a, b in _digit_groups(m))
+
+
+def counting_bytes(m):
+    # rows 1..m of "1 2 .. i \n": number k shows up in rows k..m
+    return m + sum((d + 1) * ((b - a + 1) * (m + 1) - _range_sum(a, b))
+                   for d, a, b in _digit_groups(m))
+
+
+def row_offset(name, n, position):
+    # byte offset of the row at `position` (0 = first row written)
+    if name == "repeated":
+        return repeated_bytes(position)
+    if name == "counting":
+        return counting_bytes(position)
+    if name == "inverted":
+        return counting_bytes(n) - counting_bytes(n - position)
+    raise ValueError(f"unknown pattern {name!r}")
+
+
+def split_rows(name, n, parts):
+    # row positions that cut the output into `parts` pieces of about equal size
+    total = row_offset(name, n, n)
+    cuts = [0]
+    for k in range(1, parts):
+        target = total * k // parts
+        lo, hi = cuts[-1], n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if row_offset(name, n, mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        cuts.append(lo)
+    cuts.append(n)
+    return [(cuts[k], cuts[k + 1]) for k in range(parts) if cuts[k] < cuts[k + 1]]
+
+
+def fill_part(job):
+    # runs inside a worker: writes rows lo..hi-1 at their place in the file
+    path, name, n, lo, hi, buffer_size = job
+    pos = row_offset(name, n, lo)
+    with open(path, "r+b") as f, mmap.mmap(f.fileno(), 0) as mm:
+        buffer = bytearray()
+        for row in PATTERNS[name](n, lo, hi):
+            buffer += row
+            if len(buffer) >= buffer_size:
+                mm[pos:pos + len(buffer)] = buffer
+                pos += len(buffer)
+                buffer.clear()
+        mm[pos:pos + len(buffer)] = buffer
+        pos += len(buffer)
+    return pos - row_offset(name, n, lo)
+
+
+def write_pattern(path, name, n, workers=None, buffer_size=1 << 20):
+    """Writes pattern `name` with n rows to `path` using several processes.
+
+    The file gets its final size up front, then every worker fills its
+    own byte range through mmap. Returns the file size in bytes.
+    """
+    workers = workers or os.cpu_count() or 1
+    total = row_offset(name, n, n)
+    with open(path, "wb") as f:
+        f.truncate(total)
+    if total == 0:
+        return 0
+    jobs = [(path, name, n, lo, hi, buffer_size) for lo, hi in split_rows(name, n, workers * 4)]
+    if workers == 1:
+        written = sum(map(fill_part, jobs))
+    else:
+        with Pool(workers) as pool:
+            written = sum(pool.map(fill_part, jobs))
+    assert written == total
+    return total
+
+
+def check(folder, workers=3):
+    # the parallel file must match the sequential renderer byte for byte
+    path = os.path.join(folder, "check.txt")
+    for name in PATTERNS:
+        for n in (0, 1, 2, 9, 10, 11, 99, 100, 101, 1234):
+            write_pattern(path, name, n, workers, buffer_size=64)
+            expected = io.BytesIO()
+            render(PATTERNS[name](n), expected)
+            with open(path, "rb") as f:
+                assert f.read() == expected.getvalue(), (name, n)
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    folder = tempfile.mkdtemp(prefix="patterns_")
+    try:
+        check(folder)
+        print("parallel output matches the sequential renderer")
+
+        path = os.path.join(folder, "pattern.txt")
+        for name in PATTERNS:
+            start = time.perf_counter()
+            with open(path, "wb") as f:
+                size = render(PATTERNS[name](n), f)
+            sequential = time.perf_counter() - start
+
+            start = time.perf_counter()
+            write_pattern(path, name, n, workers)
+            parallel = time.perf_counter() - start
+            print(f"{name:9s} n={n:,} ({size / 1e6:,.0f} MB): sequential "
+                  f"{size / 1e6 / sequential:7.1f} MB/s, {workers} workers "
+                  f"{size / 1e6 / parallel:7.1f} MB/s")
+            os.remove(path)
+    finally:
+        os.rmdir(folder)
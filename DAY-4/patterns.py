@@ -0,0 +1,99 @@
+import contextlib
+import os
+import sys
+import time
+
+
+# the number triangles from problems.py, one bytes object per row, exactly
+# what the print(i, end=" ") loops write:
+#   repeated_rows   1         counting_rows   1         inverted_rows  1 2 3
+#                   2 2                       1 2                      1 2
+#                   3 3 3                     1 2 3                    1
+#
+# lo and hi pick the rows at positions lo..hi-1 (0 = the first row
+# written), so a worker can make just its own share of the output.
+
+
+def repeated_rows(n, lo=0, hi=None):
+    hi = n if hi is None else hi
+    for i in range(lo + 1, hi + 1):
+        yield b"%d " % i * i + b"\n"
+
+
+def counting_rows(n, lo=0, hi=None):
+    hi = n if hi is None else hi
+    row = bytearray(b"".join(b"%d " % k for k in range(1, lo + 1)))
+    for i in range(lo + 1, hi + 1):
+        row += b"%d " % i
+        yield bytes(row) + b"\n"
+
+
+def inverted_rows(n, lo=0, hi=None):
+    # build the longest row once, every other row is a prefix of it
+    hi = n if hi is None else hi
+    longest = bytearray()
+    ends = []
+    for i in range(1, n - lo + 1):
+        longest += b"%d " % i
+        ends.append(len(longest))
+    longest = bytes(longest)
+    for end in reversed(ends[n - hi:]):
+        yield longest[:end] + b"\n"
+
+
+PATTERNS = {
+    "repeated": repeated_rows,
+    "counting": counting_rows,
+    "inverted": inverted_rows,
+}
+
+
+def render(rows, out=None, buffer_size=1 << 20):
+    # collects rows in one reusable buffer and writes it in big pieces
+    if out is None:
+        out = sys.stdout.buffer
+    buffer = bytearray()
+    written = 0
+    for row in rows:
+        buffer += row
+        if len(buffer) >= buffer_size:
+            out.write(buffer)
+            written += len(buffer)
+            buffer.clear()
+    if buffer:
+        out.write(buffer)
+        written += len(buffer)
+    out.flush()
+    return written
+
+
+def print_pattern(name, n, out=None):
+    return render(PATTERNS[name](n), out)
+
+
+def print_loop(n):
+    # the original way, one print() per number
+    for i in range(1, n + 1):
+        for j in range(i):
+            print(i, end=" ")
+        print()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    with open(os.devnull, "wb") as sink:
+        for name in PATTERNS:
+            start = time.perf_counter()
+            written = print_pattern(name, n, sink)
+            took = time.perf_counter() - start
+            print(f"{name:9s} n={n:,}: {written / 1e6:8.1f} MB in {took:6.2f}s "
+                  f"-> {written / 1e6 / took:8.1f} MB/s")
+
+    small = min(n, 2_000)
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        start = time.perf_counter()
+        print_loop(small)
+        took = time.perf_counter() - start
+    written = sum(len(row) for row in repeated_rows(small))
+    print(f"print loop n={small:,}: {written / 1e6:8.1f} MB in {took:6.2f}s "
+          f"-> {written / 1e6 / took:8.1f} MB/s")
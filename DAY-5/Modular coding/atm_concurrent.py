@@ -0,0 +1,94 @@
+import random
+import sys
+import threading
+import time
+
+from atm_store import AtmStore
+from atm_ledger import OK
+
+
+class ConcurrentAtmStore(AtmStore):
+    """AtmStore that is safe to use from many threads.
+
+    Accounts are spread over a fixed number of locks (lock stripes), so
+    two threads only wait for each other when their accounts share a
+    stripe. The pin check, balance read and balance write of a withdraw
+    all happen while holding the account's lock.
+    """
+
+    def __init__(self, stripes=64):
+        super().__init__()
+        self.stripes = [threading.Lock() for _ in range(stripes)]
+        self.open_lock = threading.Lock()
+
+    def _lock(self, customer_id):
+        return self.stripes[customer_id % len(self.stripes)]
+
+    def open_accounts(self, n):
+        with self.open_lock:
+            return super().open_accounts(n)
+
+    def create_pin(self, customer_id, pin, balance):
+        with self._lock(customer_id):
+            return super().create_pin(customer_id, pin, balance)
+
+    def change_pin(self, customer_id, old_pin, new_pin):
+        with self._lock(customer_id):
+            return super().change_pin(customer_id, old_pin, new_pin)
+
+    def check_balance(self, customer_id, pin):
+        with self._lock(customer_id):
+            return super().check_balance(customer_id, pin)
+
+    def withdraw(self, customer_id, pin, amount):
+        with self._lock(customer_id):
+            return super().withdraw(customer_id, pin, amount)
+
+
+def stress(stripes, threads=64, total_ops=1_000_000, accounts=1_000):
+    # returns (ops/sec, accounts whose balance does not match what was withdrawn)
+    store = ConcurrentAtmStore(stripes)
+    ids = store.open_accounts(accounts)
+    initial = 10 ** 9  # big enough that withdrawals keep succeeding
+    for cid in ids:
+        store.create_pin(cid, "1234", initial)
+
+    per_thread = total_ops // threads
+    withdrawn = [[0] * accounts for _ in range(threads)]  # one row per thread, no sharing
+
+    def worker(seed):
+        rng = random.Random(seed)
+        first = ids[0]
+        mine = withdrawn[seed]
+        for _ in range(per_thread):
+            i = rng.randrange(accounts)
+            if rng.random() < 0.9:
+                amount = rng.randrange(1, 200)
+                status, _ = store.withdraw(first + i, "1234", amount)
+                if status == OK:
+                    mine[i] += amount
+            else:
+                store.check_balance(first + i, "1234")
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    took = time.perf_counter() - start
+
+    # a lost update leaves more money in the account than was taken out
+    wrong = sum(1 for i, cid in enumerate(ids)
+                if initial - store.check_balance(cid, "1234")[1]
+                != sum(row[i] for row in withdrawn))
+    return per_thread * threads / took, wrong
+
+
+if __name__ == "__main__":
+    total_ops = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"64 threads, {total_ops:,} mixed withdraw/check_balance ops")
+    for stripes in (1, 4, 16, 64, 256):
+        rate, wrong = stress(stripes, total_ops=total_ops)
+        print(f"stripes={stripes:4d}  {rate:12,.0f} ops/sec  accounts out of balance: {wrong}")
+        assert wrong == 0
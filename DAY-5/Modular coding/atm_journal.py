@@ -0,0 +1,263 @@
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from array import array
+
+from atm_pin import ITERATIONS
+from atm_store import AtmStore
+from atm_ledger import OK
+
+
+# every change is one fixed size journal record: (op, customer id, a, b)
+RECORD = struct.Struct("<Bqqq")
+OPEN, CREATE, CHANGE, WITHDRAW = 1, 2, 3, 4
+
+# snapshot = header + raw pins, balances and row_of arrays
+SNAPSHOT_MAGIC = b"ATMSNAP2"
+HEADER = struct.Struct("<8sqqqqq")  # magic, generation, customer_count, rows, first id, row_of length
+PIN_SALT = struct.Struct("<16sq")  # salt, PBKDF2 iterations
+
+
+class JournaledAtmStore(AtmStore):
+    """AtmStore whose balance and pin changes survive a restart.
+
+    Every successful change is appended to a write-ahead journal file.
+    Records are collected in memory and written + fsynced together every
+    `group_commit` records (or on commit()/close()). snapshot() writes the
+    arrays to disk and starts a new journal, so recovery only has to
+    replay what happened after the last snapshot.
+
+    A method returns before its record is on disk: a crash loses the
+    records not yet committed (up to group_commit - 1 of them), even
+    though they were answered OK. Before telling anyone a change went
+    through, call commit() or check that pending_count is 0, the way
+    AtmServer does; group_commit=1 makes every call durable on return.
+
+    With `hash_pins=True` (chosen when the directory is created) the
+    journal and snapshots only ever hold salted pin hashes, see AtmStore.
+
+    Files in `directory`:
+        snapshot       the last snapshot
+        journal.<gen>  changes made after snapshot generation <gen>
+        pin_salt       the salt and iterations, for hashed pins
+    """
+
+    def __init__(self, directory, group_commit=100, hash_pins=False, pin_iterations=ITERATIONS):
+        os.makedirs(directory, exist_ok=True)
+        salt_path = os.path.join(directory, "pin_salt")
+        if os.path.exists(salt_path):
+            with open(salt_path, "rb") as f:
+                salt, pin_iterations = PIN_SALT.unpack(f.read())
+        elif hash_pins and not os.listdir(directory):
+            salt = os.urandom(16)
+            with open(salt_path, "wb") as f:
+                f.write(PIN_SALT.pack(salt, pin_iterations))
+                f.flush()
+                os.fsync(f.fileno())
+        elif hash_pins:
+            raise ValueError(f"{directory} was created without hash_pins")
+        else:
+            salt = None
+        super().__init__(salt, pin_iterations)
+        self.directory = directory
+        self.group_commit = group_commit
+        self.pending = bytearray()
+        self.pending_count = 0
+        self.generation = self._recover()
+        self.journal = open(self._journal_path(self.generation), "ab")
+
+    def _journal_path(self, generation):
+        return os.path.join(self.directory, f"journal.{generation}")
+
+    def _snapshot_path(self):
+        return os.path.join(self.directory, "snapshot")
+
+    # recovery
+
+    def _recover(self):
+        generation = 0
+        path = self._snapshot_path()
+        if os.path.exists(path):
+            generation = self._load_snapshot(path)
+
+        journals = []
+        for name in os.listdir(self.directory):
+            if name.startswith("journal."):
+                gen = int(name.split(".")[1])
+                if gen >= generation:
+                    journals.append(gen)
+        for gen in sorted(journals):
+            self._replay(self._journal_path(gen))
+            generation = gen
+        return generation
+
+    def _load_snapshot(self, path):
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                (magic, generation, customer_count, rows,
+                 self.first_id, row_of_len) = HEADER.unpack_from(mm, 0)
+                if magic != SNAPSHOT_MAGIC:
+                    raise ValueError(f"{path} is not an ATM snapshot")
+                view = memoryview(mm)
+                offset = HEADER.size
+                for column, length in ((self.pins, rows), (self.balances, rows),
+                                       (self.row_of, row_of_len)):
+                    end = offset + length * column.itemsize
+                    column.frombytes(view[offset:end])
+                    offset = end
+                view.release()
+        AtmStore.customer_count = max(AtmStore.customer_count, customer_count)
+        return generation
+
+    def _replay(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        # a crash can leave half a record at the end, it was never committed
+        usable = len(data) - len(data) % RECORD.size
+        if usable != len(data):
+            os.truncate(path, usable)
+        pins, balances, row_of = self.pins, self.balances, self.row_of
+        first = self.first_id
+        for op, customer_id, a, b in RECORD.iter_unpack(memoryview(data)[:usable]):
+            if op == WITHDRAW:
+                balances[row_of[customer_id - first]] -= a
+            elif op == CREATE:
+                row = row_of[customer_id - first]
+                pins[row] = a
+                balances[row] = b
+            elif op == CHANGE:
+                pins[row_of[customer_id - first]] = a
+            elif op == OPEN:
+                self._add_rows(customer_id, a)
+                first = self.first_id
+                AtmStore.customer_count = max(AtmStore.customer_count, customer_id + a - 1)
+
+    # journal
+
+    def _log(self, op, customer_id, a=0, b=0):
+        self.pending += RECORD.pack(op, customer_id, a, b)
+        self.pending_count += 1
+        if self.pending_count >= self.group_commit:
+            self.commit()
+
+    def commit(self):
+        if self.pending:
+            self.journal.write(self.pending)
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+            self.pending.clear()
+            self.pending_count = 0
+
+    def open_accounts(self, n):
+        ids = super().open_accounts(n)
+        self._log(OPEN, ids[0], n)
+        return ids
+
+    def create_pin(self, customer_id, pin, balance):
+        status = super().create_pin(customer_id, pin, balance)
+        if status == OK:
+            self._log(CREATE, customer_id, self.pins[self._row(customer_id)], balance)
+        return status
+
+    def change_pin(self, customer_id, old_pin, new_pin):
+        status = super().change_pin(customer_id, old_pin, new_pin)
+        if status == OK:
+            self._log(CHANGE, customer_id, self.pins[self._row(customer_id)])
+        return status
+
+    def withdraw(self, customer_id, pin, amount):
+        status, balance = super().withdraw(customer_id, pin, amount)
+        if status == OK:
+            self._log(WITHDRAW, customer_id, amount)
+        return status, balance
+
+    # snapshots
+
+    def snapshot(self):
+        self.commit()
+        self.journal.close()
+        old_generation = self.generation
+        self.generation += 1
+        self.journal = open(self._journal_path(self.generation), "ab")
+
+        path = self._snapshot_path()
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(SNAPSHOT_MAGIC, self.generation, AtmStore.customer_count,
+                                len(self.pins), self.first_id, len(self.row_of)))
+            self.pins.tofile(f)
+            self.balances.tofile(f)
+            self.row_of.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+        # the snapshot now covers every older journal
+        for gen in range(old_generation + 1):
+            try:
+                os.remove(self._journal_path(gen))
+            except FileNotFoundError:
+                pass
+
+    def close(self):
+        self.commit()
+        self.journal.close()
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    ops = 20_000
+    folder = tempfile.mkdtemp(prefix="atm_journal_")
+    try:
+        print(f"journal writes ({ops:,} withdrawals)")
+        for batch in (1, 100, 1000):
+            path = os.path.join(folder, f"batch{batch}")
+            store = JournaledAtmStore(path, group_commit=batch)
+            cid = store.open_account()
+            store.create_pin(cid, "1234", 10 ** 12)
+            start = time.perf_counter()
+            for _ in range(ops):
+                store.withdraw(cid, "1234", 1)
+            store.commit()
+            took = time.perf_counter() - start
+            store.close()
+            print(f"  fsync every {batch:5d} ops: {ops / took:12,.0f} ops/sec")
+
+        path = os.path.join(folder, "recovery")
+        store = JournaledAtmStore(path, group_commit=10_000)
+        for i, cid in enumerate(store.open_accounts(n)):
+            store.create_pin(cid, "1234", 1000 + i)
+        store.snapshot()
+        first = cid - n + 1
+        for i in range(100_000):
+            store.withdraw(first + i % n, "1234", 1)
+        store.close()
+        expected = array("q", store.balances)
+
+        start = time.perf_counter()
+        restored = JournaledAtmStore(path)
+        took = time.perf_counter() - start
+        restored.close()
+        assert restored.balances == expected
+        print(f"recovery of {n:,} accounts + 100,000 journal records: {took:.2f}s")
+
+        # hashed pins: nothing on disk gives the pin away, a restart still checks it
+        path = os.path.join(folder, "hashed")
+        store = JournaledAtmStore(path, hash_pins=True, pin_iterations=1000)
+        cid = store.open_account()
+        store.create_pin(cid, "4321", 500)
+        store.change_pin(cid, "4321", "8765")
+        store.close()
+        restored = JournaledAtmStore(path)
+        assert restored.check_balance(cid, "8765") == (OK, 500)
+        assert restored.check_balance(cid, "4321")[0] != OK
+        restored.close()
+        with open(restored._journal_path(restored.generation), "rb") as f:
+            logged = [a for op, _, a, _ in RECORD.iter_unpack(f.read()) if op in (CREATE, CHANGE)]
+        assert int("14321") not in logged and int("18765") not in logged
+    finally:
+        shutil.rmtree(folder)
@@ -0,0 +1,131 @@
+import time
+
+from atm_main import Atm
+
+
+# result status codes (same checks as the Atm menu, without the prints)
+OK = "OK"
+WRONG_PIN = "WRONG_PIN"
+INSUFFICIENT = "INSUFFICIENT"
+BAD_OP = "BAD_OP"
+BAD_AMOUNT = "BAD_AMOUNT"  # withdrawals must be > 0, balances >= 0
+PIN_EXISTS = "PIN_EXISTS"  # create_pin on an account that has one
+
+
+class AtmLedger:
+    """Applies batches of Atm operations without any input()/print().
+
+    An operation is a tuple:
+        ("create_pin", pin, balance)
+        ("change_pin", old_pin, new_pin)
+        ("check_balance", pin)
+        ("withdraw", pin, amount)
+
+    Every operation gives back a (status, balance) tuple.
+    """
+
+    def __init__(self, atm=None):
+        self.atm = atm if atm is not None else Atm()
+
+    def apply(self, ops):
+        results = []
+        self.apply_into(ops, results.append)
+        return results
+
+    def apply_into(self, ops, emit):
+        # the balance is kept in a local for the whole batch and written
+        # back to the Atm once, even if an op blows up half way; pins go
+        # through the Atm's own hooks, so a SecureAtm keeps only a hash
+        atm = self.atm
+        pin_ok, set_pin = atm._pin_ok, atm._set_pin
+        balance = atm.balance
+        count = 0
+        try:
+            for op in ops:
+                count += 1
+                name = op[0]
+                if name == "withdraw":
+                    if op[2] <= 0:
+                        emit((BAD_AMOUNT, None))
+                    elif not pin_ok(op[1]):
+                        emit((WRONG_PIN, None))
+                    elif op[2] <= balance:
+                        balance -= op[2]
+                        emit((OK, balance))
+                    else:
+                        emit((INSUFFICIENT, balance))
+                elif name == "check_balance":
+                    if pin_ok(op[1]):
+                        emit((OK, balance))
+                    else:
+                        emit((WRONG_PIN, None))
+                elif name == "change_pin":
+                    if pin_ok(op[1]):
+                        set_pin(op[2])
+                        emit((OK, None))
+                    else:
+                        emit((WRONG_PIN, None))
+                elif name == "create_pin":
+                    if op[2] < 0:
+                        emit((BAD_AMOUNT, None))
+                        continue
+                    set_pin(op[1])
+                    balance = op[2]
+                    emit((OK, balance))
+                else:
+                    emit((BAD_OP, None))
+        finally:
+            atm.balance = balance
+        return count
+
+    def summary(self, ops):
+        # only counts the statuses, handy for replaying huge logs
+        counts = {OK: 0, WRONG_PIN: 0, INSUFFICIENT: 0, BAD_OP: 0, BAD_AMOUNT: 0}
+
+        def emit(result):
+            counts[result[0]] += 1
+
+        self.apply_into(ops, emit)
+        return counts
+
+
+def read_ops(path):
+    # one operation per line, eg. "withdraw,1234,500"
+    with open(path) as f:
+        for line in f:
+            parts = line.strip().split(",")
+            if not parts[0]:
+                continue
+            name = parts[0]
+            if name == "create_pin" or name == "withdraw":
+                yield (name, parts[1], int(parts[2]))
+            elif name == "change_pin":
+                yield (name, parts[1], parts[2])
+            else:
+                yield tuple(parts)
+
+
+if __name__ == "__main__":
+    n = 1_000_000
+    ops = [("create_pin", "1234", 10 ** 12)]
+    for i in range(n - 1):
+        k = i % 4
+        if k == 0 or k == 1:
+            ops.append(("withdraw", "1234", 100))
+        elif k == 2:
+            ops.append(("check_balance", "1234"))
+        else:
+            ops.append(("withdraw", "0000", 100))
+
+    ledger = AtmLedger()
+    start = time.perf_counter()
+    results = ledger.apply(ops)
+    took = time.perf_counter() - start
+    print(f"apply   : {n} ops in {took:.3f}s -> {n / took:,.0f} ops/sec")
+
+    ledger = AtmLedger()
+    start = time.perf_counter()
+    counts = ledger.summary(ops)
+    took = time.perf_counter() - start
+    print(f"summary : {n} ops in {took:.3f}s -> {n / took:,.0f} ops/sec")
+    print(counts, "final balance:", ledger.atm.balance)
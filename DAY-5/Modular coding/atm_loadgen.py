@@ -0,0 +1,73 @@
+import asyncio
+import random
+import sys
+import time
+
+from atm_server import raise_fd_limit
+
+
+# start atm_server.py first, then:
+#   python atm_loadgen.py <sessions> <requests per session> <port>
+
+
+async def client(port, requests, latencies, start_gate):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    await start_gate.wait()
+
+    async def call(line):
+        start = time.perf_counter()
+        writer.write((line + "\n").encode())
+        await writer.drain()
+        reply = await reader.readline()
+        latencies.append(time.perf_counter() - start)
+        return reply.decode().split()
+
+    reply = await call("OPEN")
+    customer_id = reply[1]
+    await call(f"CREATE {customer_id} 1234 100000")
+    for _ in range(requests):
+        if random.random() < 0.8:
+            await call(f"WITHDRAW {customer_id} 1234 {random.randrange(1, 100)}")
+        else:
+            await call(f"BALANCE {customer_id} 1234")
+
+    writer.write(b"QUIT\n")
+    await writer.drain()
+    writer.close()
+
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+async def main(sessions, requests, port):
+    latencies = []
+    start_gate = asyncio.Event()
+    tasks = []
+    # connect in batches so the listen backlog does not overflow
+    for i in range(0, sessions, 500):
+        batch = [asyncio.create_task(client(port, requests, latencies, start_gate))
+                 for _ in range(min(500, sessions - i))]
+        tasks.extend(batch)
+        await asyncio.sleep(0.05)
+
+    start = time.perf_counter()
+    start_gate.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    took = time.perf_counter() - start
+
+    failed = sum(1 for r in results if isinstance(r, Exception))
+    latencies.sort()
+    print(f"sessions  : {sessions:,} ({failed} failed)")
+    print(f"requests  : {len(latencies):,} in {took:.2f}s -> {len(latencies) / took:,.0f} req/sec")
+    if latencies:
+        print(f"p50       : {percentile(latencies, 50) * 1000:.2f} ms")
+        print(f"p99       : {percentile(latencies, 99) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    port = int(sys.argv[3]) if len(sys.argv) > 3 else 8888
+    raise_fd_limit()
+    asyncio.run(main(sessions, requests, port))
@@ -45,7 +45,7 @@ class Atm:
 
   def create_pin(self):
     user_pin = input("Enter your pin: ")
-    self.pin = user_pin
+    self._set_pin(user_pin)
 
     user_balance = int(input("Enter Balance: "))
     self.balance = user_balance
@@ -54,13 +54,21 @@ class Atm:
     # self.menu()
 
 
+  #how the pin is kept and checked, a subclass can keep a hash instead
+  def _set_pin(self, pin):
+    self.pin = pin
+
+  def _pin_ok(self, pin):
+    return pin == self.pin
+
+
   def change_pin(self):
     old_pin = input("Enter old pin: ")
 
-    if old_pin == self.pin:
+    if self._pin_ok(old_pin):
       #Let change the pin
       new_pin = input("Enter new pin: ")
-      self.pin = new_pin
+      self._set_pin(new_pin)
       print("Pin changed Successfully!")
       # self.menu()
 
@@ -73,21 +81,21 @@ class Atm:
 
   def check_balance(self):
     user_pin = input("Enter your pin: ")
-    if user_pin == self.pin:
+    if self._pin_ok(user_pin):
       print(f"Your balance is {self.balance}")
     else:
-      print("Your pin is correct, please try again")
+      print("Your pin is wrong, please try again")
     # self.menu()
 
 
 
   def withdraw(self):
     user_pin = input("Enter your pin: ")
-    if user_pin == self.pin:
+    if self._pin_ok(user_pin):
       # Allow to withdraw
       amount = int(input("Enter the amount: "))
       if amount <= self.balance:
-        self.__balance = self.__balance - amount
+        self.balance = self.balance - amount
         print(f"withdraw successfull and the current balance is {self.balance}")
 
       else:
@@ -0,0 +1,122 @@
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from collections import OrderedDict
+
+from atm_main import Atm
+
+
+ITERATIONS = 100_000
+
+
+def hash_pin(pin, salt=None, iterations=ITERATIONS):
+    # salted PBKDF2, slow on purpose so a leaked table is hard to brute force
+    if salt is None:
+        salt = os.urandom(16)
+    return salt, hashlib.pbkdf2_hmac("sha256", pin.encode(), salt, iterations)
+
+
+def verify_pin(pin, salt, digest, iterations=ITERATIONS):
+    # compare_digest takes the same time no matter where the bytes differ
+    return hmac.compare_digest(hash_pin(pin, salt, iterations)[1], digest)
+
+
+class PinVault:
+    """Hashed pins for many customers, with a small cache of sessions.
+
+    A session that already passed the slow PBKDF2 check is remembered
+    (up to `max_sessions`, least recently used dropped first). Later
+    checks in the same session only cost one HMAC, keyed with a random
+    secret that never leaves this process.
+    """
+
+    def __init__(self, max_sessions=10_000, iterations=ITERATIONS):
+        self.iterations = iterations
+        self.max_sessions = max_sessions
+        self.hashes = {}  # customer id -> (salt, digest)
+        self.sessions = OrderedDict()  # session id -> (customer id, tag)
+        self.key = os.urandom(32)
+        self.hits = self.misses = 0
+
+    def set_pin(self, customer_id, pin):
+        self.hashes[customer_id] = hash_pin(pin, iterations=self.iterations)
+
+    def change_pin(self, customer_id, old_pin, new_pin):
+        if not self.verify(customer_id, old_pin):
+            return False
+        # the stored digest is part of every tag, so old sessions stop matching
+        self.set_pin(customer_id, new_pin)
+        return True
+
+    def new_session(self):
+        return secrets.token_hex(16)
+
+    def _tag(self, digest, pin):
+        return hmac.new(self.key, digest + pin.encode(), hashlib.sha256).digest()
+
+    def verify(self, customer_id, pin, session=None):
+        stored = self.hashes.get(customer_id)
+        if stored is None:
+            return False
+        salt, digest = stored
+
+        if session is not None:
+            cached = self.sessions.get(session)
+            if cached is not None and cached[0] == customer_id:
+                if hmac.compare_digest(cached[1], self._tag(digest, pin)):
+                    self.sessions.move_to_end(session)
+                    self.hits += 1
+                    return True
+
+        self.misses += 1
+        if not verify_pin(pin, salt, digest, self.iterations):
+            return False
+        if session is not None:
+            self.sessions[session] = (customer_id, self._tag(digest, pin))
+            self.sessions.move_to_end(session)
+            if len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+        return True
+
+
+class SecureAtm(Atm):
+    # same menu as Atm, but only a salted hash of the pin is kept
+
+    def __init__(self):
+        super().__init__()
+        self.salt = self.pin_hash = None
+
+    def _set_pin(self, pin):
+        self.salt, self.pin_hash = hash_pin(pin)
+
+    def _pin_ok(self, pin):
+        return self.pin_hash is not None and verify_pin(pin, self.salt, self.pin_hash)
+
+
+if __name__ == "__main__":
+    logins = 100_000
+    customers = 100
+    vault = PinVault(max_sessions=customers)
+    for cid in range(customers):
+        vault.set_pin(cid, str(1000 + cid))
+    sessions = [vault.new_session() for _ in range(customers)]
+
+    # without the cache every login pays for PBKDF2, time a sample of them
+    sample = 100
+    start = time.perf_counter()
+    for i in range(sample):
+        assert vault.verify(i % customers, str(1000 + i % customers))
+    per_login = (time.perf_counter() - start) / sample
+    print(f"no session cache : {per_login * 1e6:10.1f} us/login -> "
+          f"{logins * per_login:8.1f}s for {logins:,} logins")
+
+    vault.hits = vault.misses = 0
+    start = time.perf_counter()
+    for i in range(logins):
+        cid = i % customers
+        assert vault.verify(cid, str(1000 + cid), sessions[cid])
+    took = time.perf_counter() - start
+    print(f"session cache    : {took / logins * 1e6:10.1f} us/login -> "
+          f"{took:8.1f}s for {logins:,} logins ({vault.hits:,} hits, {vault.misses:,} misses)")
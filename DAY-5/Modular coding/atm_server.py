@@ -0,0 +1,125 @@
+import asyncio
+import sys
+
+from atm_journal import JournaledAtmStore
+from atm_store import AtmStore
+from atm_ledger import OK
+
+
+# line protocol, one request per line, one reply per line:
+#   OPEN                          -> OK <customer_id>
+#   CREATE <id> <pin> <balance>   -> OK <balance>   (once, before any pin is set)
+#   CHANGE <id> <old> <new>       -> OK
+#   BALANCE <id> <pin>            -> OK <balance>
+#   WITHDRAW <id> <pin> <amount>  -> OK <balance>
+#   QUIT                          -> connection closed
+# errors come back as "ERR <reason>"
+# with a JournaledAtmStore an OK is only sent once the change is fsynced;
+# requests answered in the same event loop turn share one fsync
+
+
+def raise_fd_limit():
+    # every client is one socket, the default limit (often 1024) is too low
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+class AtmServer:
+    def __init__(self, store=None):
+        self.store = store if store is not None else AtmStore()
+        self.sessions = 0
+        self.commit_waiters = []  # replies waiting for the next journal fsync
+
+    def handle(self, line):
+        parts = line.split()
+        if not parts:
+            return "ERR EMPTY"
+        cmd = parts[0].upper()
+        store = self.store
+        try:
+            if cmd == "WITHDRAW":
+                status, balance = store.withdraw(int(parts[1]), parts[2], int(parts[3]))
+            elif cmd == "BALANCE":
+                status, balance = store.check_balance(int(parts[1]), parts[2])
+            elif cmd == "CHANGE":
+                status, balance = store.change_pin(int(parts[1]), parts[2], parts[3]), None
+            elif cmd == "CREATE":
+                balance = int(parts[3])
+                status = store.create_pin(int(parts[1]), parts[2], balance)
+            elif cmd == "OPEN":
+                status, balance = OK, store.open_account()
+            else:
+                return "ERR UNKNOWN_COMMAND"
+        except IndexError:
+            return "ERR MISSING_ARGUMENT"
+        except KeyError:
+            return "ERR NO_ACCOUNT"
+        except ValueError:
+            return "ERR BAD_ARGUMENT"
+
+        if status != OK:
+            return "ERR " + status
+        return "OK" if balance is None else f"OK {balance}"
+
+    async def committed(self):
+        # wait until every journal record logged so far is on disk
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        if not self.commit_waiters:
+            loop.call_soon(self._commit)
+        self.commit_waiters.append(waiter)
+        await waiter
+
+    def _commit(self):
+        waiters, self.commit_waiters = self.commit_waiters, []
+        try:
+            self.store.commit()
+        except OSError as error:
+            for waiter in waiters:
+                waiter.set_exception(error)
+            return
+        for waiter in waiters:
+            waiter.set_result(None)
+
+    async def session(self, reader, writer):
+        self.sessions += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.decode(errors="replace").strip()
+                if line.upper() == "QUIT":
+                    break
+                reply = self.handle(line)
+                if getattr(self.store, "pending_count", 0):
+                    await self.committed()  # no OK for a change a crash could lose
+                writer.write((reply + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8888):
+        server = await asyncio.start_server(self.session, host, port, backlog=16384)
+        print(f"ATM server listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8888
+    # a journal folder as the second argument keeps the accounts across restarts
+    store = JournaledAtmStore(sys.argv[2]) if len(sys.argv) > 2 else None
+    raise_fd_limit()
+    try:
+        asyncio.run(AtmServer(store).serve(port=port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,196 @@
+import hmac
+import sys
+import time
+import tracemalloc
+from array import array
+
+from atm_main import Atm
+from atm_pin import ITERATIONS, hash_pin
+from atm_ledger import OK, WRONG_PIN, INSUFFICIENT, BAD_AMOUNT, PIN_EXISTS
+
+
+NO_PIN = -1
+NO_ROW = -1
+
+
+def encode_pin(pin):
+    # pins are kept as ints, the leading "1" keeps pins like "0012" apart from "12"
+    if not pin.isdigit() or len(pin) > 17:
+        raise ValueError("Pin must be 1 to 17 digits")
+    return int("1" + pin)
+
+
+class AtmStore:
+    """Many Atm accounts kept in typed arrays instead of one object each.
+
+    Every account is one slot in the pins and balances arrays (8 bytes
+    each), plus one 8 byte slot mapping its customer id to that row.
+    With a `pin_salt` the pins array keeps 63 bits of a PBKDF2 hash of
+    each pin (salted with pin_salt + the customer id) instead of the pin.
+    """
+
+    # class variable, shared by every store, so an id is never given twice
+    customer_count = 0
+
+    def __init__(self, pin_salt=None, pin_iterations=ITERATIONS):
+        self.pins = array("q")
+        self.balances = array("q")
+        # customer id -> row, NO_ROW if not here; it starts at this store's
+        # first id, so other stores' ids do not make it grow
+        self.row_of = array("q")
+        self.first_id = 0  # the id row_of[0] is for
+        self.pin_salt = pin_salt
+        self.pin_iterations = pin_iterations
+
+    def __len__(self):
+        return len(self.pins)
+
+    def __contains__(self, customer_id):
+        return self._row(customer_id) != NO_ROW
+
+    @classmethod
+    def _next_ids(cls, n):
+        first = cls.customer_count + 1
+        cls.customer_count += n
+        return first
+
+    def open_account(self):
+        return self.open_accounts(1)[0]
+
+    def open_accounts(self, n):
+        first = AtmStore._next_ids(n)
+        self._add_rows(first, n)
+        return range(first, first + n)
+
+    def _add_rows(self, first, n):
+        row = len(self.pins)
+        if not self.row_of:
+            self.first_id = first
+        elif first < self.first_id:
+            self.row_of[:0] = array("q", [NO_ROW]) * (self.first_id - first)
+            self.first_id = first
+        start = first - self.first_id
+        missing = start + n - len(self.row_of)
+        if missing > 0:
+            self.row_of.extend(array("q", [NO_ROW]) * missing)
+        self.row_of[start:start + n] = array("q", range(row, row + n))
+        self.pins.extend(array("q", [NO_PIN]) * n)
+        self.balances.extend(array("q", [0]) * n)
+
+    def _row(self, customer_id):
+        i = customer_id - self.first_id
+        if 0 <= i < len(self.row_of):
+            return self.row_of[i]
+        return NO_ROW
+
+    def _find(self, customer_id):
+        row = self._row(customer_id)
+        if row == NO_ROW:
+            raise KeyError(customer_id)
+        return row
+
+    def _pin_code(self, customer_id, pin):
+        # what the pins array keeps for this pin
+        code = encode_pin(pin)
+        if self.pin_salt is None:
+            return code
+        salt = self.pin_salt + customer_id.to_bytes(8, "little")
+        digest = hash_pin(pin, salt, self.pin_iterations)[1]
+        return int.from_bytes(digest[:8], "little") >> 1  # never NO_PIN
+
+    def _pin_ok(self, row, customer_id, pin):
+        code = self._pin_code(customer_id, pin)
+        if self.pin_salt is None:
+            return self.pins[row] == code
+        # hashes are compared in constant time, like verify_pin does
+        return hmac.compare_digest(self.pins[row].to_bytes(8, "little", signed=True),
+                                   code.to_bytes(8, "little", signed=True))
+
+    def create_pin(self, customer_id, pin, balance):
+        # only once per account, after that change_pin() with the old pin
+        row = self._find(customer_id)
+        if self.pins[row] != NO_PIN:
+            return PIN_EXISTS
+        if balance < 0:
+            return BAD_AMOUNT
+        self.pins[row] = self._pin_code(customer_id, pin)
+        self.balances[row] = balance
+        return OK
+
+    def change_pin(self, customer_id, old_pin, new_pin):
+        row = self._find(customer_id)
+        if not self._pin_ok(row, customer_id, old_pin):
+            return WRONG_PIN
+        self.pins[row] = self._pin_code(customer_id, new_pin)
+        return OK
+
+    def check_balance(self, customer_id, pin):
+        row = self._find(customer_id)
+        if not self._pin_ok(row, customer_id, pin):
+            return WRONG_PIN, None
+        return OK, self.balances[row]
+
+    def withdraw(self, customer_id, pin, amount):
+        if amount <= 0:
+            return BAD_AMOUNT, None
+        row = self._find(customer_id)
+        if not self._pin_ok(row, customer_id, pin):
+            return WRONG_PIN, None
+        balance = self.balances[row]
+        if amount > balance:
+            return INSUFFICIENT, balance
+        self.balances[row] = balance - amount
+        return OK, balance - amount
+
+    def nbytes(self):
+        return sum(a.itemsize * len(a) for a in (self.pins, self.balances, self.row_of))
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = build()
+    took = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return kept, size, took
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    # stores share the id counter, not their row_of sizes
+    first, second = AtmStore(), AtmStore()
+    first.open_accounts(1000)
+    cid = second.open_account()
+    assert second.nbytes() == 24 and cid in second and cid - 1 not in second
+
+    def build_objects():
+        accounts = []
+        for i in range(n):
+            atm = Atm()
+            atm.pin = str(1000 + i % 9000)
+            atm.balance = i
+            accounts.append(atm)
+        return accounts
+
+    def build_store():
+        store = AtmStore()
+        for i, cid in enumerate(store.open_accounts(n)):
+            store.create_pin(cid, str(1000 + i % 9000), i)
+        return store
+
+    objects, objects_size, objects_time = measure(build_objects)
+    del objects
+    store, store_size, store_time = measure(build_store)
+
+    print(f"accounts          : {n:,}")
+    print(f"list of Atm       : {objects_size / n:7.1f} bytes/account  ({objects_time:.2f}s)")
+    print(f"AtmStore          : {store_size / n:7.1f} bytes/account  ({store_time:.2f}s)")
+
+    ids = range(store.first_id, store.first_id + n, max(1, n // 100_000))
+    start = time.perf_counter()
+    for cid in ids:
+        store.check_balance(cid, "1000")
+    took = time.perf_counter() - start
+    print(f"lookup            : {took / len(ids) * 1e9:7.1f} ns/check_balance")
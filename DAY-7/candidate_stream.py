@@ -0,0 +1,139 @@
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from batch_eval import evaluate_cohort
+
+
+FIELDS = ["name", "roll_no", "start", "mid", "end", "technical", "hr"]
+MARKS = ["start", "mid", "end", "technical", "hr"]
+
+
+def read_rows(path):
+    # yields one dict per line, the file is never loaded as a whole
+    with open(path, newline="") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield line.rstrip("\n")
+        else:
+            yield from csv.DictReader(f)
+
+
+def parse_candidate(row):
+    # returns (candidate, None) or (None, reason); the checks are the
+    # same ones AcademicMarks and InterviewMarks raise ValueError for
+    if not isinstance(row, dict):
+        return None, "not a JSON object"
+    try:
+        candidate = {"name": str(row["name"]), "roll_no": int(row["roll_no"])}
+        for field in MARKS:
+            candidate[field] = int(row[field])
+    except KeyError as e:
+        return None, f"missing field {e}"
+    except (TypeError, ValueError):
+        return None, "marks and roll_no must be whole numbers"
+
+    if candidate["start"] < 0 or candidate["mid"] < 0 or candidate["end"] < 0:
+        return None, "Academic marks cannot be negative"
+    if candidate["technical"] > 50 or candidate["hr"] > 50:
+        return None, "Interview marks should be between 0 and 50"
+    return candidate, None
+
+
+def read_candidates(path, rejects=None):
+    # valid candidates are yielded, bad rows go to rejects(row, reason)
+    for row in read_rows(path):
+        candidate, reason = parse_candidate(row)
+        if candidate is not None:
+            yield candidate
+        elif rejects is not None:
+            rejects(row, reason)
+
+
+def chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def process_file(src, results_path, rejects_path, chunk_size=50_000):
+    """Scores every candidate in `src` (.csv or .jsonl) chunk by chunk.
+
+    Results go to `results_path` as CSV (roll_no, name, technical, hr,
+    result); rows that fail validation go to `rejects_path` together
+    with the reason. Only one chunk is ever held in memory.
+    """
+    counts = {"PASS": 0, "FAIL": 0, "REJECTED": 0}
+    with open(results_path, "w", newline="") as out, open(rejects_path, "w") as bad:
+
+        def reject(row, reason):
+            counts["REJECTED"] += 1
+            bad.write(json.dumps({"reason": reason, "row": row}) + "\n")
+
+        writer = csv.writer(out)
+        writer.writerow(["roll_no", "name", "technical", "hr", "result"])
+        for chunk in chunks(read_candidates(src, reject), chunk_size):
+            cohort = evaluate_cohort(*([c[field] for c in chunk] for field in MARKS))
+            results = cohort.results()
+            writer.writerows(
+                (c["roll_no"], c["name"], c["technical"], c["hr"], result)
+                for c, result in zip(chunk, results)
+            )
+            passed = cohort.pass_count()
+            counts["PASS"] += passed
+            counts["FAIL"] += len(chunk) - passed
+    return counts
+
+
+def write_sample(path, n, seed=7):
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for roll_no in range(1, n + 1):
+            marks = [rng.randint(0, 50) for _ in MARKS]
+            if rng.random() < 0.001:
+                marks[0] = -1
+            writer.writerow([f"student{roll_no}", roll_no] + marks)
+
+
+if __name__ == "__main__":
+    try:
+        import resource  # only on Unix, used for the peak memory line
+    except ImportError:
+        resource = None
+    folder = tempfile.mkdtemp(prefix="candidates_")
+    sizes = [int(a) for a in sys.argv[1:]] or [100_000, 1_000_000]
+    for n in sizes:
+        src = os.path.join(folder, "candidates.csv")
+        write_sample(src, n)
+
+        start = time.perf_counter()
+        counts = process_file(src, os.path.join(folder, "results.csv"),
+                              os.path.join(folder, "rejects.jsonl"))
+        took = time.perf_counter() - start
+        # ru_maxrss is in KB on Linux, it stays flat while the input grows
+        peak = "n/a"
+        if resource is not None:
+            peak = f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 / 1e6:6.1f} MB"
+
+        size_mb = os.path.getsize(src) / 1e6
+        print(f"{n:>10,} rows ({size_mb:7.1f} MB): {took:6.2f}s, "
+              f"peak RSS {peak}, {counts}")
+
+    for name in os.listdir(folder):
+        os.remove(os.path.join(folder, name))
+    os.rmdir(folder)
@@ -0,0 +1,189 @@
+import random
+import sys
+import time
+
+
+MAX_LEVELS = 32
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels
+        # width[level] = how many items next[level] jumps over (counting itself)
+        self.width = [1] * levels
+
+
+class RankedSkipList:
+    """Sorted keys with O(log n) insert, remove, rank and index lookup.
+
+    A skip list where every link also stores how many items it skips,
+    so the position of a key can be summed up on the way down.
+    """
+
+    def __init__(self):
+        self.head = _Node(None, MAX_LEVELS)
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _path(self, key):
+        # last node before key on every level, and its position
+        chain = [None] * MAX_LEVELS
+        position = [0] * MAX_LEVELS
+        node, pos = self.head, 0
+        for level in range(MAX_LEVELS - 1, -1, -1):
+            nxt = node.next[level]
+            while nxt is not None and nxt.key < key:
+                pos += node.width[level]
+                node = nxt
+                nxt = node.next[level]
+            chain[level] = node
+            position[level] = pos
+        return chain, position
+
+    def insert(self, key):
+        chain, position = self._path(key)
+        levels = 1
+        while levels < MAX_LEVELS and random.random() < 0.5:
+            levels += 1
+        new = _Node(key, levels)
+        pos = position[0] + 1  # 1-based position of the new node
+        for level in range(levels):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            skipped = pos - position[level]
+            if new.next[level] is not None:
+                new.width[level] = prev.width[level] - skipped + 1
+            prev.width[level] = skipped
+        for level in range(levels, MAX_LEVELS):
+            if chain[level].next[level] is not None:
+                chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain, _ = self._path(key)
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        for level in range(MAX_LEVELS):
+            prev = chain[level]
+            if prev.next[level] is target:
+                prev.width[level] += target.width[level] - 1
+                prev.next[level] = target.next[level]
+            elif prev.next[level] is not None:
+                prev.width[level] -= 1
+        self.size -= 1
+
+    def rank(self, key):
+        # 0-based position of key
+        chain, position = self._path(key)
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        return position[0]
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        node, remaining = self.head, index + 1
+        for level in range(MAX_LEVELS - 1, -1, -1):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node.key
+
+    def __iter__(self):
+        node = self.head.next[0]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+
+class Leaderboard:
+    """Students ranked by technical + hr score, best first.
+
+    Ties are broken by roll number so the order is always the same.
+    update() replaces a student's earlier result.
+    """
+
+    def __init__(self):
+        self.ranking = RankedSkipList()
+        self.keys = {}  # roll_no -> key in the ranking
+
+    def __len__(self):
+        return len(self.keys)
+
+    def update(self, roll_no, technical, hr):
+        old = self.keys.get(roll_no)
+        if old is not None:
+            self.ranking.remove(old)
+        key = (-(technical + hr), roll_no)
+        self.ranking.insert(key)
+        self.keys[roll_no] = key
+
+    def add_result(self, student, interview):
+        # StudentInfo + InterviewMarks from practise.py
+        self.update(student.roll_no, interview.technical, interview.hr)
+
+    def remove(self, roll_no):
+        self.ranking.remove(self.keys.pop(roll_no))
+
+    def rank(self, roll_no):
+        # 1 = best score
+        return self.ranking.rank(self.keys[roll_no]) + 1
+
+    def top(self, k):
+        board = []
+        for negative_score, roll_no in self.ranking:
+            if len(board) == k:
+                break
+            board.append((roll_no, -negative_score))
+        return board
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(1)
+    scores = {roll: (rng.randint(0, 50), rng.randint(0, 50)) for roll in range(1, n + 1)}
+
+    board = Leaderboard()
+    start = time.perf_counter()
+    for roll, (technical, hr) in scores.items():
+        board.update(roll, technical, hr)
+    print(f"build {n:,} students: {time.perf_counter() - start:.2f}s")
+
+    def resorted_rank(scores, roll):
+        ordered = sorted(scores, key=lambda r: (-(scores[r][0] + scores[r][1]), r))
+        return ordered.index(roll) + 1, ordered[:10]
+
+    # the old way: change the list, sort everything again (on a copy,
+    # so both approaches see the same data afterwards)
+    copied = dict(scores)
+    updates = 200
+    start = time.perf_counter()
+    for _ in range(updates):
+        roll = rng.randint(1, n)
+        copied[roll] = (rng.randint(0, 50), rng.randint(0, 50))
+        resorted_rank(copied, roll)
+    sort_time = (time.perf_counter() - start) / updates
+
+    updates = 20_000
+    start = time.perf_counter()
+    for _ in range(updates):
+        roll = rng.randint(1, n)
+        scores[roll] = (rng.randint(0, 50), rng.randint(0, 50))
+        board.update(roll, *scores[roll])
+        board.rank(roll)
+        board.top(10)
+    index_time = (time.perf_counter() - start) / updates
+
+    rank, top = resorted_rank(scores, roll)
+    assert board.rank(roll) == rank and [r for r, _ in board.top(10)] == top
+    print(f"update + rank + top10, re-sort  : {sort_time * 1e6:10.1f} us")
+    print(f"update + rank + top10, skip list: {index_time * 1e6:10.1f} us "
+          f"({sort_time / index_time:.0f}x faster)")
@@ -45,34 +45,29 @@ class InterviewMarks:
     def result(self):
         return "PASS" if self.technical >= 25 and self.hr >= 25 else "FAIL"
 
-try:
-    student = StudentInfo("Satheesh", 42)
-    academics = AcademicMarks(25, 30, 35)
-    interview = InterviewMarks(technical=30, hr=40)
-
-    print("\n--- Student Information ---")
-    student.display_info()
-
-    print("\n--- Academic Marks ---")
-    academics.display_academics()
-
-    print("\n--- Interview Marks ---")
-    print("Technical :", interview.technical)
-    print("HR        :", interview.hr)
-
-    print("\n--- Interview Result ---")
-    if interview.result() == "PASS":
-        print("Result : PASS")
-        print(" You got the job!")
-    else:
-        print("Result : FAIL")
-        print(" Better luck next time.")
-
-except Exception as e:
-    print("Unexpected Error:", e)
-
-
-
-
-
-
+if __name__ == "__main__":
+    try:
+        student = StudentInfo("Satheesh", 42)
+        academics = AcademicMarks(25, 30, 35)
+        interview = InterviewMarks(technical=30, hr=40)
+
+        print("\n--- Student Information ---")
+        student.display_info()
+
+        print("\n--- Academic Marks ---")
+        academics.display_academics()
+
+        print("\n--- Interview Marks ---")
+        print("Technical :", interview.technical)
+        print("HR        :", interview.hr)
+
+        print("\n--- Interview Result ---")
+        if interview.result() == "PASS":
+            print("Result : PASS")
+            print(" You got the job!")
+        else:
+            print("Result : FAIL")
+            print(" Better luck next time.")
+
+    except Exception as e:
+        print("Unexpected Error:", e)
@@ -0,0 +1,193 @@
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from array import array
+from multiprocessing import Pool
+
+from batch_eval import evaluate_cohort
+from candidate_stream import MARKS, chunks, parse_candidate, write_sample
+
+
+def read_slice(path, begin, end):
+    # the lines that *start* inside [begin, end) of the file
+    with open(path, "rb") as f:
+        if begin > 0:
+            f.seek(begin - 1)
+            f.readline()  # finish the line that began before this slice
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            yield line.decode()
+
+
+def read_slice_rows(path, begin, end):
+    if path.endswith(".jsonl"):
+        for line in read_slice(path, begin, end):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield line.rstrip("\n")
+    else:
+        with open(path, newline="") as f:
+            header = next(csv.reader(f))
+        # the header line starts at offset 0, so only the first slice sees it
+        lines = read_slice(path, begin, end)
+        if begin == 0:
+            next(lines, None)
+        for values in csv.reader(lines):
+            yield dict(zip(header, values))
+
+
+def score_slice(job):
+    # runs inside a worker process: scores one byte slice of the input and
+    # writes its results in input order, plus each row's roll number and
+    # PASS flag so split_slice() can shard them without parsing again
+    src, out_dir, index, begin, end, bounds = job
+    lo = hi = None
+    rolls, passes = array("q"), array("b")
+    scored = os.path.join(out_dir, f"scored-{index:04d}.csv")
+    with open(scored, "w", newline="") as out, \
+            open(os.path.join(out_dir, f"rejects-{index:04d}.jsonl"), "w") as bad:
+        writer = csv.writer(out)
+
+        def candidates():
+            for row in read_slice_rows(src, begin, end):
+                candidate, reason = parse_candidate(row)
+                if candidate is None:
+                    bad.write(json.dumps({"reason": reason, "row": row}) + "\n")
+                elif bounds is not None and not bounds[0] <= candidate["roll_no"] <= bounds[1]:
+                    bad.write(json.dumps({"reason": "roll_no outside shard range", "row": row}) + "\n")
+                else:
+                    yield candidate
+
+        for chunk in chunks(candidates(), 50_000):
+            cohort = evaluate_cohort(*([c[field] for c in chunk] for field in MARKS))
+            writer.writerows((c["roll_no"], c["name"], c["technical"], c["hr"], result)
+                             for c, result in zip(chunk, cohort.results()))
+            chunk_rolls = [c["roll_no"] for c in chunk]
+            rolls.extend(chunk_rolls)
+            passes.extend(map(bool, cohort.passed))
+            lo = min(chunk_rolls) if lo is None else min(lo, min(chunk_rolls))
+            hi = max(chunk_rolls) if hi is None else max(hi, max(chunk_rolls))
+
+    with open(scored + ".rolls", "wb") as f:
+        rolls.tofile(f)
+        passes.tofile(f)
+    return index, len(rolls), lo, hi
+
+
+def split_slice(job):
+    # second step, also in a worker: one part file per roll number shard,
+    # now that the range of all slices is known
+    out_dir, index, rows, lo, hi, shards = job
+    width = (hi - lo) // shards + 1
+    scored = os.path.join(out_dir, f"scored-{index:04d}.csv")
+    rolls, passes = array("q"), array("b")
+    with open(scored + ".rolls", "rb") as f:
+        rolls.fromfile(f, rows)
+        passes.fromfile(f, rows)
+    files = [open(os.path.join(out_dir, f"part-{s:04d}-{index:04d}.csv"), "wb")
+             for s in range(shards)]
+    counts = [[0, 0] for _ in range(shards)]  # [PASS, FAIL] per shard
+    with open(scored, "rb") as src:
+        for line, roll, passed in zip(src, rolls, passes):
+            shard = min((roll - lo) // width, shards - 1)
+            files[shard].write(line)
+            counts[shard][0 if passed else 1] += 1
+    for f in files:
+        f.close()
+    os.remove(scored)
+    os.remove(scored + ".rolls")
+    return index, counts
+
+
+def score_sharded(src, results_path, rejects_path, workers=None, shards=16, roll_bounds=None):
+    """Scores `src` in parallel and merges the results in roll number order.
+
+    The input is cut into one byte slice per worker. Every worker scores
+    its slice and reports the roll numbers it saw; then every worker
+    sorts its rows into `shards` ranges of the overall roll numbers (or
+    of `roll_bounds`, rejecting rows outside them). The merged result
+    file lists shard 0 first, then shard 1, ...; inside a shard the rows
+    keep their input order, so the output does not depend on `workers`.
+    Returns the PASS/FAIL counts per shard and in total.
+    """
+    workers = workers or os.cpu_count() or 1
+    size = os.path.getsize(src)
+    step = size // workers + 1
+    tmp = tempfile.mkdtemp(prefix="shards_", dir=os.path.dirname(os.path.abspath(results_path)))
+    jobs = [(src, tmp, i, i * step, min(size, (i + 1) * step), roll_bounds)
+            for i in range(workers)]
+    try:
+        pool = Pool(workers) if workers > 1 else None
+        run = pool.map if pool is not None else lambda f, items: list(map(f, items))
+        try:
+            scored = run(score_slice, jobs)
+            if roll_bounds is not None:
+                lo, hi = roll_bounds
+            else:
+                seen = [(l, h) for _, _, l, h in scored if l is not None]
+                lo = min((l for l, _ in seen), default=0)
+                hi = max((h for _, h in seen), default=0)
+            done = run(split_slice, [(tmp, i, rows, lo, hi, shards)
+                                     for i, rows, _, _ in scored])
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        per_shard = [[0, 0] for _ in range(shards)]
+        for _, counts in done:
+            for shard, (passed, failed) in enumerate(counts):
+                per_shard[shard][0] += passed
+                per_shard[shard][1] += failed
+
+        with open(results_path, "wb") as out:
+            out.write(b"roll_no,name,technical,hr,result\r\n")
+            for shard in range(shards):
+                for i in range(workers):
+                    with open(os.path.join(tmp, f"part-{shard:04d}-{i:04d}.csv"), "rb") as part:
+                        shutil.copyfileobj(part, out)
+        with open(rejects_path, "wb") as out:
+            for i in range(workers):
+                with open(os.path.join(tmp, f"rejects-{i:04d}.jsonl"), "rb") as part:
+                    shutil.copyfileobj(part, out)
+    finally:
+        shutil.rmtree(tmp)
+
+    total = {"PASS": sum(s[0] for s in per_shard), "FAIL": sum(s[1] for s in per_shard)}
+    return {"shards": [{"PASS": p, "FAIL": f} for p, f in per_shard], "total": total}
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    folder = tempfile.mkdtemp(prefix="sharded_")
+    try:
+        src = os.path.join(folder, "candidates.csv")
+        write_sample(src, n)
+        print(f"{n:,} candidates, {os.cpu_count()} cores")
+
+        steps = sorted({2 ** i for i in range(max_workers.bit_length())} | {max_workers})
+        first = None
+        for workers in steps:
+            results = os.path.join(folder, f"results-{workers}.csv")
+            start = time.perf_counter()
+            summary = score_sharded(src, results, os.path.join(folder, "rejects.jsonl"),
+                                    workers=workers)
+            took = time.perf_counter() - start
+            if first is None:
+                first = results, took
+            else:
+                with open(first[0], "rb") as a, open(results, "rb") as b:
+                    assert a.read() == b.read(), "output depends on worker count"
+            print(f"workers={workers:3d}  {took:7.2f}s  speedup {first[1] / took:5.2f}x  "
+                  f"{summary['total']}")
+    finally:
+        shutil.rmtree(folder)